@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк блочного формата: степень сжатия и время чтения срезов
+
+Запуск: python backend/benchmarks/bench_bricks.py [--depth 512]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.volume_bricks import brick_cache, convert_to_bricks
+from services.volume_reader import VOL_HEADER_SIZE, VolumeCache
+
+
+def create_phantom(path, depth):
+    """КЛКТ-подобный объем: ноль вне цилиндра реконструкции, шум и кость внутри"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:512, 0:512] - 255.5
+    radius = np.hypot(x, y)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * VOL_HEADER_SIZE)
+        for z in range(depth):
+            plane = np.zeros((512, 512), dtype=np.float32)
+            fov = radius < 250
+            plane[fov] = 300 + rng.normal(0, 30, fov.sum())
+            head = radius < 150 + 40 * np.sin(z / depth * np.pi)
+            plane[head] = 1100 + rng.normal(0, 60, head.sum())
+            plane[(radius > 120) & (radius < 135) & head] = 2600
+            f.write(np.clip(plane, 0, 4095).astype('<u2').tobytes())
+
+
+def measure(func, repeat=5, cold=False):
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            brick_cache.clear()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=512)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, 'bench.vol')
+        target = os.path.join(temp_dir, 'bench.bvol')
+        create_phantom(source, args.depth)
+        cache = VolumeCache()
+
+        start = time.perf_counter()
+        summary = convert_to_bricks(cache.get(source).data, target)
+        convert_s = time.perf_counter() - start
+
+        print(f"Объем {summary['shape']}: {summary['original_bytes'] / 2**20:.1f} МБ -> "
+              f"{summary['stored_bytes'] / 2**20:.1f} МБ (x{summary['ratio']:.2f}), "
+              f"однородных блоков {summary['uniform_bricks']}/{summary['bricks']}, "
+              f"конвертация {convert_s:.1f} с")
+
+        raw = cache.get(source)
+        bricked = cache.get(target)
+        middle = args.depth // 2
+        print(f"{'срез':<12}{'.vol, мс':>12}{'.bvol холодный':>16}{'.bvol теплый':>14}")
+        for axis in ('axial', 'coronal', 'sagittal'):
+            index = min(middle, 255)
+            vol_ms = measure(lambda: raw.plane(axis, index).copy())
+            cold_ms = measure(lambda: bricked.plane(axis, index), cold=True)
+            warm_ms = measure(lambda: bricked.plane(axis, index))
+            print(f"{axis:<12}{vol_ms:>12.2f}{cold_ms:>16.2f}{warm_ms:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк кодеков среза 512x512: время кодирования и размер
+
+Запуск: python backend/benchmarks/bench_codecs.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.slice_codecs import encode_plane
+
+# Формат, качество JPEG, уровень сжатия PNG
+CASES = [
+    ('raw', 90, 1),
+    ('png', 90, 0),
+    ('png', 90, 1),
+    ('png', 90, 6),
+    ('png', 90, 9),
+    ('webp', 90, 1),
+    ('jpeg', 75, 1),
+    ('jpeg', 90, 1),
+    ('jpeg', 95, 1),
+]
+
+
+def phantom_slice(size=512):
+    """Похожий на КЛКТ срез: воздух, мягкие ткани, кость и шум"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:size, 0:size] / size - 0.5
+    radius = np.hypot(x, y * 1.2)
+    plane = np.where(radius < 0.42, 1100.0, 50.0)
+    plane[(radius > 0.30) & (radius < 0.36)] = 2600.0
+    plane[np.hypot(x - 0.1, y + 0.05) < 0.05] = 3500.0
+    plane += rng.normal(0, 40, plane.shape)
+    return np.clip(plane, 0, 4095).astype(np.uint16)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    plane = phantom_slice()
+    window = (2048, 4096, False, 1.0)
+
+    print(f"Срез 512x512 uint16, медиана из {args.repeat} запусков")
+    print(f"{'формат':<10}{'параметр':>10}{'мс':>10}{'КБ':>10}")
+    for output_format, quality, compress_level in CASES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            data, _, _ = encode_plane(plane, window, output_format, quality, compress_level)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        if output_format == 'jpeg':
+            parameter = f"q={quality}"
+        elif output_format == 'png':
+            parameter = f"level={compress_level}"
+        else:
+            parameter = ''
+        print(f"{output_format:<10}{parameter:>10}{np.median(timings):>10.2f}{len(data) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
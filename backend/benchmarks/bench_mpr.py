@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк ортогональных срезов: аксиальный путь против coronal/sagittal
+
+Запуск: python backend/benchmarks/bench_mpr.py [--depth 512] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.volume_mpr import AXES
+from services.volume_reader import VOL_HEADER_SIZE, VolumeCache
+
+
+def create_volume(path, depth):
+    """Создает тестовый .vol файл со случайными данными"""
+    rng = np.random.default_rng(0)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * VOL_HEADER_SIZE)
+        for _ in range(depth):
+            f.write(rng.integers(0, 4096, (512, 512), dtype='<u2').tobytes())
+
+
+def measure(func, repeat):
+    """Медианное время вызова в миллисекундах"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'bench.vol')
+        create_volume(path, args.depth)
+        volume = VolumeCache().get(path)
+        middle = args.depth // 2
+
+        print(f"Объем {volume.shape}, медиана из {args.repeat} запусков")
+        print(f"{'ось':<12}{'view, мс':>12}{'копия, мс':>12}")
+        for axis in AXES:
+            index = min(middle, volume.shape[AXES.index(axis)] - 1)
+            view_ms = measure(lambda: volume.plane(axis, index), args.repeat)
+            copy_ms = measure(lambda: volume.plane(axis, index).copy(), args.repeat)
+            print(f"{axis:<12}{view_ms:>12.2f}{copy_ms:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
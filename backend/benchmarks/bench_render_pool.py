@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пула процессов рендеринга: пропускная способность от числа процессов
+
+Параллельные клиенты (потоки) запрашивают PNG срезы разных осей. При 0 процессов
+рендер идет в потоках клиентов и упирается в GIL.
+
+Запуск: python backend/benchmarks/bench_render_pool.py [--depth 512] [--slices 96]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_mpr import create_volume
+from services.render_pool import RenderPool, render_slice
+from services.slice_codecs import validate_format
+
+
+def run(pool, path, depth, slices, clients):
+    output = validate_format('png')
+    window = (2048, 4096, False, 1.0)
+    tasks = [
+        (('axial', 'coronal', 'sagittal')[i % 3], (i * 7) % depth)
+        for i in range(slices)
+    ]
+
+    def render(task):
+        axis, index = task
+        return pool.run(render_slice, path, 0, axis, index, None, 1, window, output)
+
+    with ThreadPoolExecutor(clients) as executor:
+        # Прогрев: запуск процессов и отображение файла в каждом из них
+        list(executor.map(render, tasks[:clients]))
+        start = time.perf_counter()
+        list(executor.map(render, tasks))
+        return slices / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=512)
+    parser.add_argument('--slices', type=int, default=96)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    counts = sorted({0, 1, 2, 4, cpus})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'bench.vol')
+        create_volume(path, args.depth)
+
+        print(f"Ядер: {cpus}")
+        print(f"{'процессов':<10} {'срезов/с':>10} {'ускорение':>10}")
+        baseline = None
+        for workers in counts:
+            pool = RenderPool(workers)
+            try:
+                throughput = run(pool, path, args.depth, args.slices, max(workers, 1) * 2)
+            finally:
+                pool.shutdown()
+            baseline = baseline or throughput
+            print(f"{workers:<10} {throughput:>10.1f} {throughput / baseline:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
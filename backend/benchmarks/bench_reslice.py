@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк косого среза 512x512 с трилинейной интерполяцией (один поток)
+
+Запуск: python backend/benchmarks/bench_reslice.py [--depth 512] [--repeat 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.volume_reader import VolumeCache
+from services.volume_reslice import oblique_plane
+from bench_mpr import create_volume
+
+BUDGET_MS = 50.0
+
+NORMALS = {
+    'axial': (0, 0, 1),
+    'tilted 20°': (0, 0.34, 0.94),
+    'sagittal': (1, 0, 0),
+    'diagonal': (1, 1, 1),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'bench.vol')
+        create_volume(path, args.depth)
+        volume = VolumeCache().get(path)
+        center = (256, 256, args.depth / 2)
+
+        print(f"Объем {volume.shape}, плоскость 512x512, лучший из {args.repeat} запусков")
+        print(f"{'плоскость':<14}{'мс':>10}")
+        worst = 0.0
+        for name, normal in NORMALS.items():
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                oblique_plane(volume.data, center, normal, (512, 512))
+                timings.append((time.perf_counter() - start) * 1000)
+            best = min(timings)
+            worst = max(worst, best)
+            print(f"{name:<14}{best:>10.2f}")
+
+        verdict = 'OK' if worst < BUDGET_MS else 'ПРЕВЫШЕН'
+        print(f"Бюджет {BUDGET_MS:.0f} мс: {verdict} (худший случай {worst:.2f} мс)")
+
+
+if __name__ == '__main__':
+    main()
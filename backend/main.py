@@ -3,6 +3,8 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 
+from routes import volumes
+
 app = FastAPI(
     title="Medical Imaging System",
     description="A modern web-based medical imaging system",
@@ -28,4 +30,5 @@ async def root(request: Request):
 # Include routers
 # app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 # app.include_router(clinics.router, prefix="/clinics", tags=["Clinics"])
-# app.include_router(images.router, prefix="/images", tags=["Images"]) 
\ No newline at end of file
+# app.include_router(images.router, prefix="/images", tags=["Images"])
+app.include_router(volumes.router, prefix="/api", tags=["Volumes"])
@@ -18,6 +18,8 @@ import logging
 import webbrowser
 import time
 import threading
+from services.volume_scout import build_scouts, scout_meta
+from services.volume_store import StoreUpload, read_names, resolve_name
 
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:3000', 'http://192.168.0.140:3000', 'http://127.0.0.1:3000'])
@@ -595,8 +597,8 @@ HTML_TEMPLATE = """
                 const filesGrid = document.getElementById('filesGrid');
                 filesGrid.innerHTML = files.map(file => `
                     <div class="file-item">
-                        <span class="file-name">${file}</span>
-                        <button class="btn btn-primary btn-sm" onclick="openFile('${file}')">
+                        <span class="file-name">${file.name}${file.scout ? ' 🖼️' : ''}</span>
+                        <button class="btn btn-primary btn-sm" onclick="openFile('${file.name}')">
                             🚀 Открыть
                         </button>
                     </div>
@@ -731,10 +733,15 @@ def get_status():
 def get_files():
     """Получение списка доступных файлов"""
     try:
-        files = []
+        names = sorted(read_names())
         for file in os.listdir('.'):
-            if file.endswith('.zip') or file.endswith('.vol'):
-                files.append(file)
+            if (file.endswith('.zip') or file.endswith('.vol')) and file not in names:
+                names.append(file)
+        # scout - готовы ли миниатюры, как в /api/files основного сервера
+        files = [
+            {'name': name, 'scout': scout_meta(resolve_name(name) or os.path.abspath(name)) is not None}
+            for name in names
+        ]
         response = jsonify(files)
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
@@ -743,6 +750,17 @@ def get_files():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_scouts_later(file_path):
+    """Миниатюры загруженного исследования в фоновом потоке, не задерживая ответ"""
+    def build():
+        try:
+            build_scouts(file_path)
+        except Exception as e:
+            logger.warning(f"Не удалось построить миниатюры для {file_path}: {e}")
+
+    if file_path.endswith(('.vol', '.zip')):
+        threading.Thread(target=build, daemon=True).start()
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Загрузка файла"""
@@ -754,19 +772,31 @@ def upload_file():
         if file.filename == '':
             return jsonify({'success': False, 'message': 'Файл не выбран'})
         
-        # Сохраняем файл
-        filename = file.filename
-        file.save(filename)
+        # Сохраняем файл в хранилище под дайджестом, хешируя по ходу записи
+        upload = StoreUpload(file.filename)
+        try:
+            with open(upload.temp_path, 'wb') as f:
+                while chunk := file.stream.read(1024 * 1024):
+                    upload.update(chunk)
+                    f.write(chunk)
+            stored = upload.commit()
+        except BaseException:
+            upload.abort()
+            raise
+        filename = stored['name']
+        build_scouts_later(stored['path'])
         
         # Запускаем OneVolumeViewer
-        success, message = launcher.launch_onevolume_viewer(filename)
+        success, message = launcher.launch_onevolume_viewer(stored['path'])
         
         if success:
             launcher.current_file = filename
             return jsonify({
                 'success': True,
                 'message': message,
-                'file': filename
+                'file': filename,
+                'digest': stored['digest'],
+                'duplicate': stored['duplicate']
             })
         else:
             return jsonify({'success': False, 'message': message})
@@ -778,7 +808,7 @@ def upload_file():
 def open_file(filename):
     """Открытие файла по имени"""
     try:
-        file_path = os.path.join(os.getcwd(), filename)
+        file_path = resolve_name(filename) or os.path.join(os.getcwd(), filename)
         
         if not os.path.exists(file_path):
             return jsonify({'success': False, 'message': f'Файл {filename} не найден'})
@@ -809,7 +839,7 @@ def launch_direct():
         if not filename:
             return jsonify({'success': False, 'message': 'Имя файла не указано'})
         
-        file_path = os.path.join(os.getcwd(), filename)
+        file_path = resolve_name(filename) or os.path.join(os.getcwd(), filename)
         
         if not os.path.exists(file_path):
             return jsonify({'success': False, 'message': f'Файл {filename} не найден в директории {os.getcwd()}'})
@@ -0,0 +1,675 @@
+"""
+ASGI версия эндпоинтов simple_server: объемы, файлы и статус OneVolumeViewer
+
+Обработчики асинхронные, а все блокирующее - чтение memory map, рендер и
+кодирование срезов, статистика, сетки - уходит в ограниченный пул потоков
+(при RENDER_WORKERS > 0 рендер дальше уходит в пул процессов). Цикл событий
+занят только разбором запросов и отправкой байт, поэтому один процесс держит
+сотни одновременных потоков срезов, а задержка ограничена размером пула.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+import aiofiles
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Request, UploadFile, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from services.onevolume_launcher import launcher
+from services.render_cache import render_cache
+from services.render_pool import render_oblique, render_pool, render_slice, render_tile
+from services.slice_codecs import validate_format
+from services.slice_prefetch import slice_prefetcher
+from services.volume_crop import crop_stream, parse_box, resolve_box
+from services.volume_filters import filter_cache, validate_filter
+from services.volume_measure import DEFAULT_ROI_BINS, measure_region, parse_coords
+from services.volume_mesh import default_threshold, get_mesh, mesh_cache, validate_budget
+from services.volume_mpr import plane_count
+from services.volume_profile import parse_polyline, sample_profile
+from services.volume_pyramid import MAX_LEVEL, build_pyramid, open_level
+from services.volume_reader import MappedVolume, open_volume, volume_key
+from services.volume_reslice import validate_plane_size
+from services.volume_requests import (
+    cached_render, find_file, list_volume_files, parse_vector, parse_window, volume_info
+)
+from services.volume_scout import build_scouts, get_scout, scout_meta
+from services.volume_stats import get_stats
+from services.volume_store import StoreUpload, link_existing
+from services.volume_stream import parse_byte_range, progressive_levels, slice_batch
+from services.volume_tiles import TILE_MAX_AGE, tile_layout
+
+logger = logging.getLogger(__name__)
+
+# Потоки для блокирующих чтений и рендера; очередь сверх этого ждет, не занимая цикл событий
+VOLUME_IO_WORKERS = int(os.getenv("VOLUME_IO_WORKERS", "32"))
+
+# Размер блока при потоковой отдаче и приеме файлов
+FILE_CHUNK_SIZE = 1024 * 1024
+
+NO_CACHE_HEADERS = {'Cache-Control': 'no-cache, no-store, must-revalidate'}
+
+router = APIRouter()
+
+_executor = ThreadPoolExecutor(VOLUME_IO_WORKERS, thread_name_prefix='volume-io')
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Выполняет блокирующую функцию в пуле потоков объемов"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+async def run_volume(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """run_blocking с ошибками параметров (ValueError, IndexError) в виде ответа 400"""
+    try:
+        return await run_blocking(func, *args, **kwargs)
+    except (IndexError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def iterate_blocking(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Асинхронная обертка итератора, читающего memory map: каждый блок - в пуле потоков"""
+    done = object()
+    while True:
+        chunk = await run_blocking(next, chunks, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+async def read_file_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    """Байты файла с start по end включительно, неблокирующим чтением"""
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(FILE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def volume_path(filename: Optional[str]) -> str:
+    """Путь к файлу объема по имени из запроса; 400 без имени, 404 если не найден"""
+    if not filename:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Файл не указан')
+    file_path = await run_blocking(find_file, filename)
+    if not file_path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Файл не найден: {filename}')
+    return file_path
+
+
+def rendered_response(rendered) -> Response:
+    data, mimetype, headers = rendered
+    return Response(data, media_type=mimetype, headers=headers)
+
+
+async def render_params(
+    file_path: str,
+    output_format: str,
+    quality: Optional[int],
+    compress: Optional[int],
+    wc: Optional[float],
+    ww: Optional[float],
+    preset: Optional[str],
+    invert: bool,
+    gamma: float
+):
+    """Формат ответа и окно/уровень; окно не нужно для raw и считается по статистике в пуле"""
+    try:
+        output = validate_format(output_format, quality, compress)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    window = None
+    if output[0] != 'raw':
+        window = await run_volume(parse_window, file_path, wc, ww, preset, invert, gamma)
+    return output, window
+
+
+@router.get('/status')
+async def get_status():
+    """Получение статуса системы"""
+    return JSONResponse(launcher.get_status(), headers=NO_CACHE_HEADERS)
+
+
+@router.get('/files')
+async def get_files():
+    """Получение списка файлов"""
+    return {'files': await run_blocking(list_volume_files)}
+
+
+async def build_scouts_later(file_path: str) -> None:
+    """Миниатюры загруженного исследования в фоне, после ответа клиенту"""
+    try:
+        await run_blocking(build_scouts, file_path)
+    except Exception as e:
+        logger.warning(f"Не удалось построить миниатюры для {file_path}: {e}")
+
+
+async def build_pyramid_later(file_path: str) -> None:
+    """Пирамида загруженного объема в фоне: прогрессивная выдача сразу начинается с грубого уровня"""
+    try:
+        await run_blocking(build_pyramid, file_path)
+    except Exception as e:
+        logger.warning(f"Не удалось построить пирамиду для {file_path}: {e}")
+
+
+@router.post('/upload')
+async def upload_file(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    """
+    Загрузка исследования в хранилище и запуск OneVolumeViewer.
+
+    Файл хешируется по мере записи и хранится один раз под дайджестом;
+    повторная загрузка того же исследования только связывает с ним имя.
+    """
+    filename = os.path.basename(file.filename or '')
+    if not filename:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Файл не выбран')
+    try:
+        upload = await run_blocking(StoreUpload, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Файл пишется блоками без блокировки цикла событий, дайджест считается по ходу
+    try:
+        async with aiofiles.open(upload.temp_path, 'wb') as f:
+            while chunk := await file.read(FILE_CHUNK_SIZE):
+                upload.update(chunk)
+                await f.write(chunk)
+        stored = await run_blocking(upload.commit)
+    except BaseException:
+        await run_blocking(upload.abort)
+        raise
+
+    return await open_stored(stored, background_tasks)
+
+
+@router.post('/upload-digest')
+async def upload_digest(request: Request, background_tasks: BackgroundTasks):
+    """
+    Повторная загрузка без передачи данных: {filename, digest} уже сохраненного исследования.
+
+    404 - исследования с таким дайджестом нет, его нужно загрузить через /api/upload.
+    """
+    data = await request.json()
+    stored = await run_volume(link_existing, data.get('filename') or '', data.get('digest') or '')
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Исследование не найдено в хранилище')
+    return await open_stored(stored, background_tasks)
+
+
+async def open_stored(stored: dict, background_tasks: BackgroundTasks) -> dict:
+    """Миниатюры в фоне и запуск OneVolumeViewer для файла из хранилища"""
+    if stored['path'].endswith(('.vol', '.zip')):
+        background_tasks.add_task(build_scouts_later, stored['path'])
+    if stored['path'].endswith('.vol'):
+        background_tasks.add_task(build_pyramid_later, stored['path'])
+
+    success, message = await run_blocking(launcher.launch_onevolume_viewer, stored['path'])
+    return {
+        'success': success,
+        'message': message,
+        'file': stored['name'],
+        'digest': stored['digest'],
+        'duplicate': stored['duplicate']
+    }
+
+
+@router.post('/launch-direct')
+async def launch_direct(request: Request):
+    """Запуск OneVolumeViewer"""
+    data = await request.json()
+    filename = data.get('filename')
+
+    if not filename:
+        return {'success': False, 'message': 'Имя файла не указано'}
+
+    file_path = await run_blocking(find_file, filename)
+    if not file_path:
+        return {'success': False, 'message': f'Файл {filename} не найден'}
+
+    success, message = await run_blocking(launcher.launch_onevolume_viewer, file_path)
+    return {'success': success, 'message': message}
+
+
+@router.api_route('/open/{filename}', methods=['GET', 'POST'])
+async def open_file(filename: str):
+    """Открытие файла по имени в OneVolumeViewer (как /api/open в onevolume_server и веб-лаунчере)"""
+    file_path = await run_blocking(find_file, filename)
+    if not file_path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Файл {filename} не найден')
+
+    success, message = await run_blocking(launcher.launch_onevolume_viewer, file_path)
+    return {'success': success, 'message': message, 'file': filename}
+
+
+@router.post('/stop')
+async def stop_viewer():
+    """Остановка OneVolumeViewer"""
+    success, message = await run_blocking(launcher.stop_onevolume_viewer)
+    return {'success': success, 'message': message}
+
+
+@router.get('/volume-data')
+async def get_volume_data(file: Optional[str] = None):
+    """Получение данных объема"""
+    file_path = await volume_path(file)
+    return await run_volume(volume_info, file_path, file)
+
+
+@router.get('/volume-scout')
+async def get_volume_scout(request: Request, file: Optional[str] = None, view: str = 'axial'):
+    """Миниатюра исследования (axial, coronal, sagittal или mip) в PNG; строится при первом запросе"""
+    file_path = await volume_path(file)
+    image = await run_volume(get_scout, file_path, view)
+
+    meta = await run_blocking(scout_meta, file_path)
+    headers = {'Cache-Control': 'no-cache'}
+    if meta is not None:
+        headers['ETag'] = f'"{meta["mtime_ns"]:x}-{view}"'
+        if headers['ETag'] == request.headers.get('if-none-match'):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(image, media_type='image/png', headers=headers)
+
+
+@router.get('/volume-slice')
+async def get_volume_slice(
+    request: Request,
+    file: Optional[str] = None,
+    slice: int = 0,
+    axis: str = 'axial',
+    mode: Optional[str] = None,
+    thickness: int = 1,
+    level: int = 0,
+    session: Optional[str] = None,
+    format: str = 'png',
+    quality: Optional[int] = None,
+    compress: Optional[int] = None,
+    wc: Optional[float] = None,
+    ww: Optional[float] = None,
+    preset: Optional[str] = None,
+    invert: bool = False,
+    gamma: float = 1.0,
+    filter: Optional[str] = None
+):
+    """Получение среза объема; filter (gaussian, median, sharpen) применяется только к слою вокруг среза"""
+    file_path = await volume_path(file)
+    if filter:
+        await run_volume(validate_filter, filter)
+    output, window = await render_params(file_path, format, quality, compress, wc, ww, preset, invert, gamma)
+    if not mode:
+        thickness = 1
+    view = (axis, level, mode, thickness, window, output, filter)
+
+    def slice_job(index):
+        key = volume_key(file_path) + ('slice', index) + view
+
+        def render():
+            # При RENDER_WORKERS > 0 рендер идет в пуле процессов поверх общих memory map
+            return render_pool.run(
+                render_slice, file_path, level, axis, index, mode, thickness, window, output, filter
+            )
+
+        return key, render
+
+    client = request.client.host if request.client else None
+    scroll = (session or client, file_path) + view
+
+    def serve():
+        rendered = cached_render(*slice_job(slice))
+        # Соседние срезы готовятся в фоне по ходу прокрутки этой сессии
+        count = plane_count(open_level(file_path, level).shape, axis)
+        slice_prefetcher.schedule(scroll, slice, count, slice_job)
+        return rendered
+
+    return rendered_response(await run_volume(serve))
+
+
+@router.get('/volume-tiles')
+async def get_volume_tiles(file: Optional[str] = None, axis: str = 'axial'):
+    """Масштабы и сетка тайлов среза для /api/volume-tile"""
+    file_path = await volume_path(file)
+
+    def layout():
+        return tile_layout(open_volume(file_path).shape, axis)
+
+    return await run_volume(layout)
+
+
+@router.get('/volume-tile/{axis}/{index}/{zoom}/{x}/{y}')
+async def get_volume_tile(
+    request: Request,
+    axis: str,
+    index: int,
+    zoom: int,
+    x: int,
+    y: int,
+    file: Optional[str] = None,
+    format: str = 'png',
+    quality: Optional[int] = None,
+    compress: Optional[int] = None,
+    wc: Optional[float] = None,
+    ww: Optional[float] = None,
+    preset: Optional[str] = None,
+    invert: bool = False,
+    gamma: float = 1.0,
+    filter: Optional[str] = None
+):
+    """
+    Тайл 256x256 среза index (вокселы исходного объема) на масштабе zoom (0 - самый грубый).
+
+    Ответ определяется URL и версией файла, поэтому отдается с ETag и кэшируется браузером.
+    """
+    file_path = await volume_path(file)
+    if filter:
+        await run_volume(validate_filter, filter)
+    output, window = await render_params(file_path, format, quality, compress, wc, ww, preset, invert, gamma)
+
+    def tile_key():
+        return volume_key(file_path) + ('tile', axis, index, zoom, x, y, window, output, filter)
+
+    key = await run_blocking(tile_key)
+
+    headers = {
+        'ETag': '"' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20] + '"',
+        'Cache-Control': f'public, max-age={TILE_MAX_AGE}',
+    }
+    if request.headers.get('if-none-match') == headers['ETag']:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    def render():
+        return render_pool.run(render_tile, file_path, axis, index, zoom, x, y, window, output, filter)
+
+    data, mimetype, tile_headers = await run_volume(cached_render, key, render)
+    return Response(data, media_type=mimetype, headers={**tile_headers, **headers})
+
+
+@router.get('/volume-slices')
+async def get_volume_slices(
+    file: Optional[str] = None,
+    axis: str = 'axial',
+    start: int = 0,
+    stop: Optional[int] = None,
+    step: int = 1,
+    level: int = 0
+):
+    """Диапазон срезов одним бинарным ответом (uint16, заголовок JSON со смещениями)"""
+    file_path = await volume_path(file)
+    if stop is None:
+        stop = start + 1
+
+    def batch():
+        return slice_batch(open_level(file_path, level), axis, start, stop, step)
+
+    size, chunks = await run_volume(batch)
+    return StreamingResponse(
+        iterate_blocking(chunks),
+        media_type='application/octet-stream',
+        headers={'Content-Length': str(size)}
+    )
+
+
+@router.get('/volume-oblique')
+async def get_volume_oblique(
+    file: Optional[str] = None,
+    level: int = 0,
+    point: Optional[str] = None,
+    normal: str = '0,0,1',
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    spacing: float = 1.0,
+    format: str = 'png',
+    quality: Optional[int] = None,
+    compress: Optional[int] = None,
+    wc: Optional[float] = None,
+    ww: Optional[float] = None,
+    preset: Optional[str] = None,
+    invert: bool = False,
+    gamma: float = 1.0
+):
+    """Косой срез объема: плоскость задается точкой и нормалью (x,y,z в вокселях)"""
+    file_path = await volume_path(file)
+    depth, volume_height, volume_width = (await run_volume(open_level, file_path, level)).shape
+
+    try:
+        center = parse_vector(point or f'{volume_width / 2},{volume_height / 2},{depth / 2}')
+        direction = parse_vector(normal)
+        size = validate_plane_size((width or volume_width, height or volume_height), spacing)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    output, window = await render_params(file_path, format, quality, compress, wc, ww, preset, invert, gamma)
+
+    def serve():
+        key = volume_key(file_path) + (
+            'oblique', tuple(center), tuple(direction), size, spacing, level, window, output
+        )
+
+        def render():
+            return render_pool.run(
+                render_oblique, file_path, level, tuple(center), tuple(direction), size, spacing, window, output
+            )
+
+        return cached_render(key, render)
+
+    return rendered_response(await run_volume(serve))
+
+
+@router.get('/volume-raw')
+async def get_volume_raw(request: Request, file: Optional[str] = None):
+    """
+    Бинарный .vol файл с поддержкой Range и ETag/If-None-Match.
+
+    Файл читается блоками через aiofiles без загрузки в память. Заголовки
+    X-Volume-* позволяют клиенту вычислить диапазон байт нужных срезов:
+    offset = header + slice * slice_bytes.
+    """
+    file_path = await volume_path(file)
+    volume = await run_volume(open_volume, file_path)
+    if not isinstance(volume, MappedVolume):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Файл хранится в блочном формате, используйте срезы или /api/volume-slices'
+        )
+    size = (await run_blocking(os.stat, volume.path)).st_size
+
+    headers = {
+        'ETag': f'"{volume.mtime_ns:x}-{size:x}"',
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'no-cache',
+        'X-Volume-Header-Size': str(volume.header_size),
+        'X-Volume-Shape': ','.join(str(dim) for dim in volume.shape),
+        'X-Volume-Dtype': volume.data.dtype.name,
+        'X-Volume-Spacing': ','.join(str(step) for step in volume.spacing),
+        'X-Volume-Slice-Bytes': str(volume.slice_bytes),
+    }
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and headers['ETag'] in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        byte_range = parse_byte_range(request.headers.get('range'), size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={'Content-Range': f'bytes */{size}'}
+        )
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    headers['Content-Length'] = str(end - start + 1)
+
+    return StreamingResponse(
+        read_file_range(volume.path, start, end),
+        status_code=status_code,
+        media_type='application/octet-stream',
+        headers=headers
+    )
+
+
+@router.get('/volume-crop')
+async def get_volume_crop(
+    file: Optional[str] = None,
+    box: Optional[str] = None,
+    units: str = 'voxel',
+    level: int = 0,
+    format: str = 'raw'
+):
+    """Область объема x0,y0,z0,x1,y1,z1 (вокселы или мм) как raw uint16 или NIfTI"""
+    if not box:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Область не указана')
+    file_path = await volume_path(file)
+
+    def crop():
+        volume = open_level(file_path, level)
+        region = resolve_box(volume, parse_box(box), units)
+        return crop_stream(volume, region, format, level)
+
+    size, chunks = await run_volume(crop)
+
+    headers = {'Content-Length': str(size)}
+    if format == 'nifti':
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        headers['Content-Disposition'] = f'attachment; filename="{name}_roi.nii"'
+    return StreamingResponse(iterate_blocking(chunks), media_type='application/octet-stream', headers=headers)
+
+
+@router.get('/volume-roi')
+async def get_volume_roi(
+    file: Optional[str] = None,
+    shape: str = 'rect',
+    coords: Optional[str] = None,
+    axis: str = 'axial',
+    index: int = 0,
+    level: int = 0,
+    bins: int = DEFAULT_ROI_BINS,
+    slope: float = 1.0,
+    intercept: float = 0.0
+):
+    """
+    Статистика области: rect (u0,v0,u1,v1), ellipse (cu,cv,ru,rv), polygon (u,v,...)
+    на срезе axis/index или sphere (x,y,z,r) в вокселях (см. services/volume_measure.py)
+    """
+    if not coords:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Координаты области не указаны')
+    file_path = await volume_path(file)
+
+    def measure():
+        volume = open_level(file_path, level)
+        return measure_region(volume, shape, parse_coords(coords), axis, index, bins, slope, intercept)
+
+    return await run_volume(measure)
+
+
+@router.get('/volume-profile')
+async def get_volume_profile(
+    file: Optional[str] = None,
+    points: Optional[str] = None,
+    step: Optional[float] = None,
+    level: int = 0
+):
+    """Профиль интенсивности вдоль ломаной x,y,z,... (вокселы уровня) с шагом step мм"""
+    if not points:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Ломаная не указана')
+    file_path = await volume_path(file)
+
+    def profile():
+        return sample_profile(open_level(file_path, level), parse_polyline(points), step)
+
+    return await run_volume(profile)
+
+
+@router.get('/volume-stats')
+async def get_volume_stats(file: Optional[str] = None):
+    """Статистика интенсивностей объема: min/max, перцентили, гистограмма"""
+    file_path = await volume_path(file)
+    return await run_volume(get_stats, file_path)
+
+
+@router.get('/cache-stats')
+async def get_cache_stats():
+    """Счетчики кэша готовых срезов, упреждающего чтения, сеток и отфильтрованных слоев"""
+    stats = render_cache.stats()
+    stats['prefetch'] = slice_prefetcher.stats()
+    stats['mesh'] = mesh_cache.stats()
+    stats['filter'] = filter_cache.stats()
+    return stats
+
+
+@router.get('/volume-level')
+async def get_volume_level(file: Optional[str] = None, level: int = MAX_LEVEL):
+    """Весь объем уровня пирамиды как little-endian uint16 (превью для 3D)"""
+    file_path = await volume_path(file)
+    if level < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Уровень 0 слишком велик для выдачи целиком, используйте /api/volume-raw'
+        )
+
+    def read_level():
+        volume = open_level(file_path, level)
+        return volume.shape, volume.data.astype('<u2', copy=False).tobytes()
+
+    shape, data = await run_volume(read_level)
+    return Response(
+        data,
+        media_type='application/octet-stream',
+        headers={'X-Volume-Shape': ','.join(str(size) for size in shape), 'X-Volume-Dtype': 'uint16'}
+    )
+
+
+@router.get('/volume-progressive')
+async def get_volume_progressive(
+    request: Request,
+    file: Optional[str] = None,
+    finest: int = 0,
+    coarsest: int = MAX_LEVEL
+):
+    """
+    Объем от грубого уровня к точному кадрами [uint32 длина][JSON][uint16] (см. progressive_levels).
+
+    Если клиент ушел (закрыл вьюер или открыл другой файл), выдача
+    прекращается и оставшиеся уровни не читаются.
+    """
+    file_path = await volume_path(file)
+    size, chunks = await run_volume(progressive_levels, file_path, finest, coarsest)
+
+    async def stream():
+        async for chunk in iterate_blocking(chunks):
+            if await request.is_disconnected():
+                logger.info(f"Прогрессивная выдача {file} прервана клиентом")
+                return
+            yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type='application/octet-stream',
+        headers={'Content-Length': str(size), 'Cache-Control': 'no-cache'}
+    )
+
+
+@router.get('/volume-mesh')
+async def get_volume_mesh(
+    file: Optional[str] = None,
+    threshold: Optional[float] = None,
+    level: int = 1,
+    triangles: Optional[int] = None
+):
+    """Изоповерхность по порогу: квантованные вершины и индексы треугольников (см. services/volume_mesh.py)"""
+    file_path = await volume_path(file)
+
+    def mesh():
+        budget = validate_budget(triangles)
+        value = threshold if threshold is not None else default_threshold(file_path, level)
+        return get_mesh(file_path, int(round(value)), level, budget)
+
+    return Response(await run_volume(mesh), media_type='application/octet-stream')
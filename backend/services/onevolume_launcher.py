@@ -0,0 +1,124 @@
+"""
+Запуск внешнего OneVolumeViewer.exe для выбранного файла
+"""
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class OneVolumeViewerLauncher:
+    def __init__(self):
+        self.onevolume_path = self.find_onevolume_viewer()
+        self.current_file = None
+        self.process = None
+        
+    def find_onevolume_viewer(self):
+        """Поиск OneVolumeViewer.exe"""
+        possible_paths = [
+            "OneVolumeViewer.exe",
+            os.path.join(BACKEND_DIR, "OneVolumeViewer.exe"),
+            os.path.join(os.path.dirname(BACKEND_DIR), "OneVolumeViewer.exe")
+        ]
+        
+        for path in possible_paths:
+            if os.path.exists(path):
+                logger.info(f"Найден OneVolumeViewer: {os.path.abspath(path)}")
+                return os.path.abspath(path)
+        
+        logger.warning("OneVolumeViewer.exe не найден")
+        return None
+    
+    def extract_archive(self, zip_path):
+        """Извлечение ZIP архива"""
+        try:
+            with tempfile.TemporaryDirectory(prefix="ovv_") as temp_dir:
+                logger.info(f"Извлекаем архив: {zip_path}")
+                
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    zip_ref.extractall(temp_dir)
+                
+                # Ищем .vol файл
+                vol_file = None
+                for root, dirs, files in os.walk(temp_dir):
+                    for file in files:
+                        if file.endswith('.vol'):
+                            vol_file = os.path.join(root, file)
+                            logger.info(f"Найден .vol файл: {vol_file}")
+                            break
+                    if vol_file:
+                        break
+                
+                if vol_file:
+                    return vol_file
+                else:
+                    logger.error("Файл .vol не найден в архиве")
+                    return None
+                    
+        except Exception as e:
+            logger.error(f"Ошибка извлечения архива: {e}")
+            return None
+    
+    def launch_onevolume_viewer(self, file_path):
+        """Запуск OneVolumeViewer.exe"""
+        try:
+            if not self.onevolume_path:
+                return False, "OneVolumeViewer.exe не найден"
+            
+            # Останавливаем предыдущий процесс
+            if self.process:
+                self.stop_onevolume_viewer()
+            
+            # Определяем команду в зависимости от платформы
+            if platform.system() == "Windows":
+                if file_path.endswith('.zip'):
+                    # Извлекаем архив
+                    vol_file = self.extract_archive(file_path)
+                    if not vol_file:
+                        return False, "Не удалось извлечь .vol файл из архива"
+                    file_path = vol_file
+                
+                logger.info(f"Запуск команды Windows: {self.onevolume_path} {file_path}")
+                self.process = subprocess.Popen([self.onevolume_path, file_path])
+            else:
+                logger.error("Неподдерживаемая платформа")
+                return False, "Неподдерживаемая платформа"
+            
+            self.current_file = file_path
+            return True, "OneVolumeViewer запущен успешно"
+            
+        except Exception as e:
+            logger.error(f"Ошибка запуска OneVolumeViewer: {e}")
+            return False, f"Ошибка запуска: {str(e)}"
+    
+    def stop_onevolume_viewer(self):
+        """Остановка OneVolumeViewer"""
+        try:
+            if self.process:
+                self.process.terminate()
+                self.process.wait(timeout=5)
+                self.process = None
+                self.current_file = None
+                return True, "OneVolumeViewer остановлен"
+            return True, "OneVolumeViewer не был запущен"
+        except Exception as e:
+            logger.error(f"Ошибка остановки OneVolumeViewer: {e}")
+            return False, f"Ошибка остановки: {str(e)}"
+    
+    def get_status(self):
+        """Получение статуса системы"""
+        return {
+            'onevolume_found': self.onevolume_path is not None,
+            'platform': platform.system(),
+            'status': 'running' if self.process else 'stopped',
+            'current_file': self.current_file
+        }
+
+
+launcher = OneVolumeViewerLauncher()
@@ -0,0 +1,131 @@
+"""
+Пул процессов для рендеринга срезов в обход GIL
+
+Процессы не получают воксели через pickle: каждый открывает объем сам через
+общий кэш volume_reader, то есть отображает тот же файл (и файлы уровней
+пирамиды) в память. Страницы файла в page cache общие для всех процессов,
+между процессами передаются только параметры среза и готовые байты ответа.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.slice_codecs import encode_plane
+from services.volume_filters import filtered_level
+from services.volume_pyramid import open_level
+from services.volume_reslice import oblique_plane
+from services.volume_tiles import level_index, tile_bounds, zoom_level
+
+logger = logging.getLogger(__name__)
+
+# 0 - рендер в вызывающем потоке, без пула
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))
+
+Rendered = Tuple[bytes, str, Dict[str, str]]
+
+
+def render_slice(
+    path: str,
+    level: int,
+    axis: str,
+    index: int,
+    mode: Optional[str],
+    thickness: int,
+    window: Optional[Tuple],
+    output: Tuple,
+    filter_name: Optional[str] = None
+) -> Rendered:
+    """Ортогональный срез или толстый слой, закодированный в выбранный формат"""
+    # Срез - view на memory map, файл открывается один раз на процесс;
+    # индексы и толщина задаются в вокселях выбранного уровня пирамиды.
+    # С фильтром читается только слой вокруг среза (см. services/volume_filters.py)
+    volume = filtered_level(path, level, filter_name) if filter_name else open_level(path, level)
+    if mode:
+        # Толстый слой: MIP / MinIP / среднее вокруг среза
+        plane = volume.slab(axis, index, thickness, mode)
+    else:
+        plane = volume.plane(axis, index)
+    return encode_plane(plane, window, *output)
+
+
+def render_tile(
+    path: str,
+    axis: str,
+    index: int,
+    zoom: int,
+    x: int,
+    y: int,
+    window: Optional[Tuple],
+    output: Tuple,
+    filter_name: Optional[str] = None
+) -> Rendered:
+    """Тайл среза index (в вокселях исходного объема) на масштабе zoom"""
+    level = zoom_level(zoom)
+    level_slice = level_index(open_level(path, 0).shape, axis, index, level)
+    volume = filtered_level(path, level, filter_name) if filter_name else open_level(path, level)
+    rows, cols = tile_bounds(volume.shape, axis, x, y)
+    # Читается только прямоугольник тайла, а не весь срез
+    return encode_plane(volume.plane_region(axis, level_slice, rows, cols), window, *output)
+
+
+def render_oblique(
+    path: str,
+    level: int,
+    point: Tuple[float, float, float],
+    normal: Tuple[float, float, float],
+    size: Tuple[int, int],
+    spacing: float,
+    window: Optional[Tuple],
+    output: Tuple
+) -> Rendered:
+    """Косой срез, закодированный в выбранный формат"""
+    volume = open_level(path, level)
+    return encode_plane(oblique_plane(volume.data, point, normal, size, spacing), window, *output)
+
+
+class RenderPool:
+    """Пул процессов рендеринга; при workers = 0 задачи выполняются на месте"""
+
+    def __init__(self, workers: int = RENDER_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: сервер многопоточный, fork копировал бы захваченные блокировки
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def run(self, func: Callable[..., Any], *args) -> Any:
+        """Выполняет func(*args) в пуле и ждет результат"""
+        if not self.enabled:
+            return func(*args)
+        try:
+            return self._get_executor().submit(func, *args).result()
+        except BrokenProcessPool:
+            # Процесс упал (например, по памяти) - пересоздаем пул и повторяем один раз
+            logger.warning("Пул рендеринга сломан, перезапускаем")
+            self.shutdown()
+            return self._get_executor().submit(func, *args).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+render_pool = RenderPool()
@@ -0,0 +1,93 @@
+"""
+Кодирование срезов: raw uint16, PNG, WebP (lossless), JPEG
+"""
+import io
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from services.volume_render import apply_window, window_lut
+
+FORMATS = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'raw': 'application/octet-stream',
+}
+
+DEFAULT_JPEG_QUALITY = 90
+# Уровень 1 примерно втрое быстрее уровня Pillow по умолчанию (6) при размере больше на ~15%
+# (см. benchmarks/bench_codecs.py)
+DEFAULT_PNG_COMPRESS_LEVEL = 1
+
+
+def validate_format(
+    output_format: str,
+    quality: Optional[int] = None,
+    compress_level: Optional[int] = None
+) -> Tuple[str, int, int]:
+    """Проверяет формат и его параметры, подставляет значения по умолчанию"""
+    if output_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {output_format}. Допустимые значения: {', '.join(FORMATS)}")
+
+    quality = DEFAULT_JPEG_QUALITY if quality is None else quality
+    if not 1 <= quality <= 100:
+        raise ValueError("Качество должно быть от 1 до 100")
+
+    compress_level = DEFAULT_PNG_COMPRESS_LEVEL if compress_level is None else compress_level
+    if not 0 <= compress_level <= 9:
+        raise ValueError("Уровень сжатия PNG должен быть от 0 до 9")
+
+    return output_format, quality, compress_level
+
+
+def encode_raw(plane: np.ndarray) -> Tuple[bytes, str, Dict[str, str]]:
+    """Срез как little-endian uint16 для окна/уровня на клиенте"""
+    headers = {
+        'X-Slice-Shape': ','.join(str(size) for size in plane.shape),
+        'X-Slice-Dtype': 'uint16',
+    }
+    return plane.astype('<u2', copy=False).tobytes(), FORMATS['raw'], headers
+
+
+def encode_image(
+    image: np.ndarray,
+    output_format: str = 'png',
+    quality: int = DEFAULT_JPEG_QUALITY,
+    compress_level: int = DEFAULT_PNG_COMPRESS_LEVEL
+) -> Tuple[bytes, str, Dict[str, str]]:
+    """Кодирует 8-битное изображение в PNG, WebP (без потерь) или JPEG"""
+    img = Image.fromarray(image, mode='L')
+    img_io = io.BytesIO()
+
+    if output_format == 'png':
+        img.save(img_io, 'PNG', compress_level=compress_level)
+    elif output_format == 'webp':
+        # method=0 - самый быстрый режим кодера без потерь
+        img.save(img_io, 'WEBP', lossless=True, quality=0, method=0)
+    elif output_format == 'jpeg':
+        img.save(img_io, 'JPEG', quality=quality)
+    else:
+        raise ValueError(f"Формат {output_format} не является изображением")
+
+    return img_io.getvalue(), FORMATS[output_format], {}
+
+
+def encode_plane(
+    plane: np.ndarray,
+    window: Optional[Tuple[int, int, bool, float]],
+    output_format: str = 'png',
+    quality: int = DEFAULT_JPEG_QUALITY,
+    compress_level: int = DEFAULT_PNG_COMPRESS_LEVEL
+) -> Tuple[bytes, str, Dict[str, str]]:
+    """
+    Кодирует uint16 срез в выбранный формат.
+
+    Для raw окно не применяется, для остальных форматов срез сначала
+    переводится в 8 бит через таблицу окна/уровня.
+    """
+    if output_format == 'raw':
+        return encode_raw(plane)
+    image = apply_window(plane, window_lut(*window))
+    return encode_image(image, output_format, quality, compress_level)
@@ -0,0 +1,170 @@
+"""
+Фоновое упреждающее чтение соседних срезов при прокрутке
+
+На каждый запрос среза N пул потоков заранее рендерит срезы по ходу прокрутки
+и кладет их в кэш готовых срезов. Направление и шаг прокрутки отслеживаются
+отдельно для каждой сессии: при устойчивом движении глубина уходит вперед,
+без направления - поровну в обе стороны.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from services.render_cache import RenderCache, render_cache
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "4"))
+
+# Сколько сессий прокрутки и подготовленных ключей помнить
+MAX_SESSIONS = 256
+MAX_TRACKED = 4096
+
+# Фабрика задачи: номер среза -> (ключ кэша, функция рендера)
+JobFactory = Callable[[int], Tuple[Hashable, Callable[[], Any]]]
+
+
+class SlicePrefetcher:
+    """Пул упреждающего рендеринга с адаптивной глубиной и счетчиком полезности"""
+
+    def __init__(
+        self,
+        workers: int = PREFETCH_WORKERS,
+        depth: int = PREFETCH_DEPTH,
+        cache: RenderCache = render_cache
+    ):
+        self.workers = workers
+        self.depth = depth
+        self.cache = cache
+        self.scheduled = 0
+        self.completed = 0
+        self.hits = 0
+        self.requests = 0
+        self._executor = None
+        self._sessions = OrderedDict()
+        self._pending = {}
+        self._prefetched = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and self.depth > 0
+
+    def _track_session(self, session: Hashable, index: int) -> Tuple[int, int]:
+        """Обновляет состояние сессии; возвращает (направление, шаг) прокрутки"""
+        previous = self._sessions.pop(session, None)
+        direction, stride = 0, 1
+        if previous is not None:
+            delta = index - previous[0]
+            # Прыжок дальше глубины упреждения - не прокрутка, направление сбрасывается
+            if delta and abs(delta) <= self.depth:
+                direction = 1 if delta > 0 else -1
+                stride = abs(delta)
+                if previous[1] and previous[1] != direction:
+                    # Смена направления: пока не доверяем ему
+                    direction = 0
+        self._sessions[session] = (index, direction)
+        while len(self._sessions) > MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+        return direction, stride
+
+    def targets(self, session: Hashable, index: int, count: int) -> list:
+        """Номера срезов для упреждения в порядке приоритета"""
+        with self._lock:
+            direction, stride = self._track_session(session, index)
+
+        if direction:
+            offsets = [direction * stride * step for step in range(1, self.depth + 1)]
+            offsets.append(-direction)
+        else:
+            half = max(self.depth // 2, 1)
+            offsets = [sign * step for step in range(1, half + 1) for sign in (1, -1)]
+        return [index + offset for offset in offsets if 0 <= index + offset < count]
+
+    def schedule(self, session: Hashable, index: int, count: int, job: JobFactory) -> int:
+        """Ставит в очередь соседей среза index; возвращает число новых задач"""
+        if not self.enabled:
+            return 0
+
+        submitted = 0
+        for target in self.targets(session, index, count):
+            key, render = job(target)
+            with self._lock:
+                if key in self._pending or key in self.cache:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='prefetch')
+                future = self._executor.submit(self._run, key, render)
+                self._pending[key] = future
+                self.scheduled += 1
+                submitted += 1
+        return submitted
+
+    def _run(self, key: Hashable, render: Callable[[], Any]) -> Optional[Any]:
+        try:
+            rendered = render()
+        except Exception as e:
+            logger.debug(f"Упреждающий рендер {key} не удался: {e}")
+            rendered = None
+
+        with self._lock:
+            if rendered is not None:
+                self.cache.put(key, rendered, len(rendered[0]))
+                self.completed += 1
+                self._prefetched[key] = True
+                while len(self._prefetched) > MAX_TRACKED:
+                    self._prefetched.popitem(last=False)
+            self._pending.pop(key, None)
+        return rendered
+
+    def wait(self, key: Hashable) -> Optional[Any]:
+        """Результат уже запущенного упреждающего рендера ключа или None"""
+        with self._lock:
+            future: Optional[Future] = self._pending.get(key)
+        if future is None:
+            return None
+        return future.result()
+
+    def claim(self, key: Hashable) -> bool:
+        """Учитывает запрос клиента; True, если ответ был подготовлен заранее"""
+        with self._lock:
+            self.requests += 1
+            if self._prefetched.pop(key, None) is None:
+                return False
+            self.hits += 1
+            return True
+
+    def stats(self) -> Dict:
+        """Счетчики упреждения для мониторинга"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'depth': self.depth,
+                'pending': len(self._pending),
+                'scheduled': self.scheduled,
+                'completed': self.completed,
+                'hits': self.hits,
+                'requests': self.requests,
+                # Доля запросов, обслуженных упреждением, и доля полезных упреждений
+                'hit_rate': self.hits / self.requests if self.requests else 0.0,
+                'useful_rate': self.hits / self.completed if self.completed else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._prefetched.clear()
+            self.scheduled = self.completed = self.hits = self.requests = 0
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+slice_prefetcher = SlicePrefetcher()
@@ -0,0 +1,294 @@
+"""
+Блочный (bricked) формат объемов: независимо сжатые блоки 64³ и индекс блоков
+
+Структура файла .bvol:
+    8 байт   - сигнатура BRICK_MAGIC
+    4 байта  - длина JSON заголовка (uint32 little-endian)
+    JSON     - форма, тип данных, размер блока, кодек, шаг вокселя
+    индекс   - для каждого блока (смещение uint64, длина uint64, заполнение uint64)
+    данные   - сжатые блоки подряд
+
+Блок нулевой длины однороден и целиком заполнен значением из индекса
+(воздух вокруг пациента). Остальные блоки хранятся сжатыми байтами uint16,
+разложенными на младшие и старшие (byte shuffle) - так сжатие заметно лучше.
+Кодек - zstd, если установлен пакет zstandard (распаковка в несколько раз
+быстрее), иначе zlib из стандартной библиотеки.
+
+Конвертация: python -m services.volume_bricks input.vol output.bvol (из каталога backend)
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Hashable, Tuple
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from services.render_cache import RenderCache
+
+BRICK_MAGIC = b'BVOL\x00\x01\x00\x00'
+BRICK_SUFFIX = '.bvol'
+BRICK_SIZE = 64
+CODECS = ('zstd-shuffle', 'zlib-shuffle')
+DEFAULT_CODEC = 'zstd-shuffle' if zstandard is not None else 'zlib-shuffle'
+
+BRICK_CACHE_BYTES = int(os.getenv("BRICK_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+# Общий кэш распакованных блоков всех открытых объемов
+brick_cache = RenderCache(BRICK_CACHE_BYTES)
+
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('length', '<u8'), ('fill', '<u8')])
+
+
+def is_bricked(path: str) -> bool:
+    """Проверяет сигнатуру блочного формата"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(BRICK_MAGIC)) == BRICK_MAGIC
+    except OSError:
+        return False
+
+
+def _compress(brick: np.ndarray, codec: str) -> bytes:
+    shuffled = np.ascontiguousarray(brick).view(np.uint8).reshape(-1, brick.itemsize).T.tobytes()
+    if codec == 'zstd-shuffle':
+        return zstandard.ZstdCompressor(level=3).compress(shuffled)
+    return zlib.compress(shuffled, 1)
+
+
+def _decompress(payload: bytes, shape: Tuple[int, ...], dtype: np.dtype, codec: str) -> np.ndarray:
+    if codec == 'zstd-shuffle':
+        raw = np.frombuffer(zstandard.ZstdDecompressor().decompress(payload), dtype=np.uint8)
+    else:
+        raw = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+
+    count = raw.size // dtype.itemsize
+    out = np.empty(count, dtype=dtype)
+    planes = out.view(np.uint8)
+    for byte in range(dtype.itemsize):
+        planes[byte::dtype.itemsize] = raw[byte * count:(byte + 1) * count]
+    return out.reshape(shape)
+
+
+def convert_to_bricks(
+    data: np.ndarray,
+    target: str,
+    brick_size: int = BRICK_SIZE,
+    codec: str = DEFAULT_CODEC,
+    spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+) -> dict:
+    """
+    Сохраняет объем (z, y, x) в блочном формате.
+
+    Исходник читается слоями по brick_size аксиальных плоскостей, в памяти
+    одновременно находится только один слой. Возвращает сводку по размерам.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Неизвестный кодек: {codec}. Допустимые значения: {', '.join(CODECS)}")
+    if codec == 'zstd-shuffle' and zstandard is None:
+        raise ValueError("Для кодека zstd требуется пакет zstandard")
+
+    shape = tuple(int(size) for size in data.shape)
+    grid = tuple(-(-size // brick_size) for size in shape)
+    header = json.dumps({
+        'shape': shape,
+        'dtype': np.dtype(data.dtype).str,
+        'brick': brick_size,
+        'codec': codec,
+        'spacing': [float(step) for step in spacing],
+    }).encode('utf-8')
+
+    index = np.zeros(grid, dtype=INDEX_DTYPE)
+    temp = f'{target}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(BRICK_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        index_offset = f.tell()
+        f.write(index.tobytes())
+
+        for bz in range(grid[0]):
+            layer = np.asarray(data[bz * brick_size:(bz + 1) * brick_size])
+            for by in range(grid[1]):
+                for bx in range(grid[2]):
+                    brick = layer[:, by * brick_size:(by + 1) * brick_size, bx * brick_size:(bx + 1) * brick_size]
+                    low, high = brick.min(), brick.max()
+                    if low == high:
+                        index[bz, by, bx] = (0, 0, int(low))
+                        continue
+                    payload = _compress(brick, codec)
+                    index[bz, by, bx] = (f.tell(), len(payload), 0)
+                    f.write(payload)
+
+        stored = f.tell()
+        f.seek(index_offset)
+        f.write(index.tobytes())
+
+    os.replace(temp, target)
+    original = int(np.prod(shape)) * np.dtype(data.dtype).itemsize
+    return {
+        'shape': shape,
+        'bricks': int(index.size),
+        'uniform_bricks': int((index['length'] == 0).sum()),
+        'original_bytes': original,
+        'stored_bytes': stored,
+        'ratio': original / stored,
+        'codec': codec,
+    }
+
+
+class BrickArray:
+    """
+    Массив (z, y, x) поверх блочного файла.
+
+    Поддерживает базовую индексацию целыми числами и срезами с положительным шагом;
+    результат - обычный ndarray, собранный только из затронутых блоков.
+    """
+
+    def __init__(self, path: str, cache_key: Hashable):
+        self.path = path
+        self.cache_key = cache_key
+
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(BRICK_MAGIC)] != BRICK_MAGIC:
+            raise ValueError(f"Файл не является блочным объемом: {path}")
+        (header_length,) = struct.unpack_from('<I', self._mmap, len(BRICK_MAGIC))
+        header_start = len(BRICK_MAGIC) + 4
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        self.codec = header.get('codec')
+        if self.codec not in CODECS:
+            raise ValueError(f"Неподдерживаемый кодек блоков: {self.codec}")
+        if self.codec == 'zstd-shuffle' and zstandard is None:
+            raise ValueError("Для чтения блоков zstd требуется пакет zstandard")
+
+        self.shape = tuple(header['shape'])
+        self.dtype = np.dtype(header['dtype'])
+        self.brick = header['brick']
+        self.spacing = tuple(header.get('spacing', (1.0, 1.0, 1.0)))
+        self.grid = tuple(-(-size // self.brick) for size in self.shape)
+        self.index = np.frombuffer(
+            self._mmap,
+            dtype=INDEX_DTYPE,
+            count=int(np.prod(self.grid)),
+            offset=header_start + header_length
+        ).reshape(self.grid)
+
+    @property
+    def ndim(self) -> int:
+        return 3
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:, :, :]
+        return data if dtype is None else data.astype(dtype)
+
+    def load_brick(self, bz: int, by: int, bx: int) -> np.ndarray:
+        """Распакованный блок (через общий кэш блоков)"""
+        key = (self.cache_key, bz, by, bx)
+        brick = brick_cache.get(key)
+        if brick is not None:
+            return brick
+
+        shape = tuple(
+            min(self.brick, size - position * self.brick)
+            for size, position in zip(self.shape, (bz, by, bx))
+        )
+        offset, length, fill = self.index[bz, by, bx]
+        if length == 0:
+            brick = np.full(shape, fill, dtype=self.dtype)
+        else:
+            brick = _decompress(self._mmap[offset:offset + length], shape, self.dtype, self.codec)
+        brick.flags.writeable = False
+
+        brick_cache.put(key, brick, brick.nbytes)
+        return brick
+
+    def _normalize_key(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError("Слишком много индексов для трехмерного объема")
+        key = key + (slice(None),) * (3 - len(key))
+
+        ranges, squeeze = [], []
+        for axis, item in enumerate(key):
+            size = self.shape[axis]
+            if isinstance(item, (int, np.integer)):
+                index = int(item) + size if item < 0 else int(item)
+                if not 0 <= index < size:
+                    raise IndexError(f"Индекс {item} вне диапазона оси {axis} размера {size}")
+                ranges.append(range(index, index + 1))
+                squeeze.append(axis)
+            elif isinstance(item, slice):
+                selected = range(*item.indices(size))
+                if selected.step < 0:
+                    raise IndexError("Отрицательный шаг не поддерживается")
+                ranges.append(selected)
+            else:
+                raise IndexError(f"Неподдерживаемый индекс: {item!r}")
+        return ranges, tuple(squeeze)
+
+    def __getitem__(self, key) -> np.ndarray:
+        ranges, squeeze = self._normalize_key(key)
+        out = np.empty(tuple(len(selected) for selected in ranges), dtype=self.dtype)
+        if out.size == 0:
+            return out.squeeze(axis=squeeze)
+
+        # Для каждой оси: номера блоков и соответствующие срезы внутри блока и в результате
+        per_axis = []
+        for selected in ranges:
+            parts = []
+            first = selected[0] // self.brick
+            last = selected[-1] // self.brick
+            for block in range(first, last + 1):
+                begin = block * self.brick
+                end = begin + self.brick
+                k0 = max(0, -(-(begin - selected.start) // selected.step))
+                k1 = min(len(selected), -(-(end - selected.start) // selected.step))
+                if k0 >= k1:
+                    continue
+                local = slice(selected[k0] - begin, selected[k1 - 1] - begin + 1, selected.step)
+                parts.append((block, local, slice(k0, k1)))
+            per_axis.append(parts)
+
+        for bz, local_z, out_z in per_axis[0]:
+            for by, local_y, out_y in per_axis[1]:
+                for bx, local_x, out_x in per_axis[2]:
+                    brick = self.load_brick(bz, by, bx)
+                    out[out_z, out_y, out_x] = brick[local_z, local_y, local_x]
+
+        return out.squeeze(axis=squeeze) if squeeze else out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвертация .vol в блочный формат .bvol")
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--brick', type=int, default=BRICK_SIZE)
+    parser.add_argument('--codec', choices=CODECS, default=DEFAULT_CODEC)
+    args = parser.parse_args()
+
+    from services.volume_reader import open_volume
+
+    volume = open_volume(args.source)
+    summary = convert_to_bricks(volume.data, args.target, args.brick, args.codec, volume.spacing)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Вырезка прямоугольной области объема (ROI) для экспорта: raw uint16 или NIfTI-1
+
+Область собирается из memory map по аксиальным плоскостям по мере отправки,
+весь объем в память не загружается.
+"""
+import struct
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from services.volume_reader import ArrayVolume
+from services.volume_stream import pack_header
+
+CROP_FORMATS = ('raw', 'nifti')
+CROP_UNITS = ('voxel', 'mm')
+
+# Заголовок NIfTI-1 (348 байт) + 4 байта расширения, данные с vox_offset = 352
+NIFTI_HEADER_SIZE = 348
+NIFTI_VOX_OFFSET = 352
+NIFTI_UINT16 = 512
+
+# Блок (x0, y0, z0, x1, y1, z1): начало включительно, конец не включительно
+Box = Tuple[int, int, int, int, int, int]
+
+
+def parse_box(value: str) -> Tuple[float, ...]:
+    """Разбор 'x0,y0,z0,x1,y1,z1'"""
+    try:
+        box = tuple(float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError(f"Некорректная область: {value}")
+    if len(box) != 6:
+        raise ValueError(f"Область задается шестью числами x0,y0,z0,x1,y1,z1: {value}")
+    if not np.all(np.isfinite(box)):
+        raise ValueError(f"Границы области должны быть конечными числами: {value}")
+    return box
+
+
+def resolve_box(volume: ArrayVolume, box: Tuple[float, ...], units: str = 'voxel') -> Box:
+    """Область в вокселях объема, обрезанная по его границам; мм переводятся по шагу вокселя"""
+    if units not in CROP_UNITS:
+        raise ValueError(f"Неизвестные единицы: {units}. Допустимые значения: {', '.join(CROP_UNITS)}")
+
+    depth, height, width = volume.shape
+    if units == 'mm':
+        step = volume.spacing[::-1]
+        start = [int(np.floor(box[axis] / step[axis])) for axis in range(3)]
+        stop = [int(np.ceil(box[axis + 3] / step[axis])) for axis in range(3)]
+    else:
+        start = [int(np.floor(value)) for value in box[:3]]
+        stop = [int(np.ceil(value)) for value in box[3:]]
+
+    limits = (width, height, depth)
+    start = [min(max(value, 0), limit) for value, limit in zip(start, limits)]
+    stop = [min(max(value, 0), limit) for value, limit in zip(stop, limits)]
+    if any(end <= begin for begin, end in zip(start, stop)):
+        raise ValueError("Область пуста или лежит вне объема")
+    return tuple(start) + tuple(stop)
+
+
+def nifti_header(shape: Tuple[int, int, int], spacing: Tuple[float, float, float], origin: Tuple[float, ...]) -> bytes:
+    """
+    Заголовок NIfTI-1 (.nii) для uint16 данных.
+
+    shape и spacing - в порядке (z, y, x); origin - положение первого вокселя (x, y, z) в мм.
+    Массив (z, y, x) в C-порядке совпадает с порядком NIfTI, где x меняется быстрее всего.
+    """
+    header = bytearray(NIFTI_HEADER_SIZE)
+    struct.pack_into('<i', header, 0, NIFTI_HEADER_SIZE)
+    struct.pack_into('<8h', header, 40, 3, shape[2], shape[1], shape[0], 1, 1, 1, 1)
+    struct.pack_into('<hh', header, 70, NIFTI_UINT16, 16)
+    struct.pack_into('<8f', header, 76, 1.0, spacing[2], spacing[1], spacing[0], 0, 0, 0, 0)
+    struct.pack_into('<f', header, 108, float(NIFTI_VOX_OFFSET))
+    # scl_slope = 1, scl_inter = 0; единицы - мм (xyzt_units = 2)
+    struct.pack_into('<ff', header, 112, 1.0, 0.0)
+    header[123] = 2
+    # sform_code = 1 (scanner anat) с диагональной матрицей шага и сдвигом начала
+    struct.pack_into('<hh', header, 252, 0, 1)
+    struct.pack_into('<4f', header, 280, spacing[2], 0, 0, origin[0])
+    struct.pack_into('<4f', header, 296, 0, spacing[1], 0, origin[1])
+    struct.pack_into('<4f', header, 312, 0, 0, spacing[0], origin[2])
+    header[344:348] = b'n+1\0'
+    return bytes(header) + b'\0' * (NIFTI_VOX_OFFSET - NIFTI_HEADER_SIZE)
+
+
+def crop_stream(
+    volume: ArrayVolume,
+    box: Box,
+    output_format: str = 'raw',
+    level: int = 0
+) -> Tuple[int, Iterator[bytes]]:
+    """
+    Экспорт области: полный размер ответа и итератор его частей.
+
+    raw: [uint32 длина][JSON: shape (z, y, x), dtype, origin, spacing][uint16 little-endian].
+    nifti: одиночный .nii файл.
+    """
+    if output_format not in CROP_FORMATS:
+        raise ValueError(f"Неизвестный формат: {output_format}. Допустимые значения: {', '.join(CROP_FORMATS)}")
+
+    x0, y0, z0, x1, y1, z1 = box
+    shape = (z1 - z0, y1 - y0, x1 - x0)
+    origin = [float(start * step) for start, step in zip((x0, y0, z0), volume.spacing[::-1])]
+
+    if output_format == 'nifti':
+        header = nifti_header(shape, volume.spacing, origin)
+    else:
+        header = pack_header({
+            'shape': shape,
+            'dtype': 'uint16',
+            'byteorder': 'little',
+            'level': level,
+            'origin_voxel': [x0, y0, z0],
+            'origin_mm': origin,
+            'spacing': list(volume.spacing),
+        }, align=4)
+
+    def generate():
+        yield header
+        for z in range(z0, z1):
+            # Базовая индексация: view на memory map или только затронутые блоки .bvol
+            plane = volume.data[z, y0:y1, x0:x1]
+            yield np.ascontiguousarray(plane, dtype='<u2').tobytes()
+
+    return len(header) + int(np.prod(shape)) * 2, generate()
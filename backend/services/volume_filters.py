@@ -0,0 +1,177 @@
+"""
+Отложенная фильтрация объема (gaussian, median, sharpen) по слоям с кэшем
+
+Весь объем не фильтруется: для запрошенного среза фильтруется только слой из
+FILTER_CHUNK плоскостей вдоль оси среза плюс поле (halo) радиуса ядра с каждой
+стороны, поэтому результат совпадает с фильтрацией всего объема. Готовые слои
+хранятся в LRU кэше по (объем, фильтр, ось, номер слоя), соседние срезы при
+прокрутке берутся из того же слоя. На границах объема значения продолжаются
+крайними вокселями.
+"""
+import os
+from typing import Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+from services.render_cache import RenderCache
+from services.volume_mpr import AXES, SLAB_MODES, plane_count, slab_range, validate_axis
+from services.volume_pyramid import open_level
+from services.volume_reader import ArrayVolume, volume_key
+
+FILTER_CHUNK = 16
+FILTER_CACHE_BYTES = int(os.getenv("FILTER_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+GAUSSIAN_SIGMA = 1.0
+GAUSSIAN_RADIUS = 2
+SHARPEN_AMOUNT = 1.0
+
+filter_cache = RenderCache(FILTER_CACHE_BYTES)
+
+
+def gaussian_kernel(sigma: float = GAUSSIAN_SIGMA, radius: int = GAUSSIAN_RADIUS) -> np.ndarray:
+    """Нормированное одномерное ядро Гаусса длины 2 * radius + 1"""
+    offsets = np.arange(-radius, radius + 1, dtype=np.float32)
+    kernel = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+    return kernel / kernel.sum()
+
+
+def convolve_valid(block: np.ndarray, kernel: np.ndarray, axis: int) -> np.ndarray:
+    """Свертка вдоль оси без дополнения: ось укорачивается на len(kernel) - 1"""
+    size = block.shape[axis] - len(kernel) + 1
+    out = np.zeros(block.shape[:axis] + (size,) + block.shape[axis + 1:], dtype=np.float32)
+    for offset, weight in enumerate(kernel):
+        out += weight * np.take(block, np.arange(offset, offset + size), axis=axis)
+    return out
+
+
+def gaussian(padded: np.ndarray) -> np.ndarray:
+    """Разделимое сглаживание Гаусса 5x5x5 (sigma = 1 воксель)"""
+    kernel = gaussian_kernel()
+    result = padded.astype(np.float32)
+    for axis in range(3):
+        result = convolve_valid(result, kernel, axis)
+    return result
+
+
+def median(padded: np.ndarray) -> np.ndarray:
+    """Медиана окна 3x3x3; окна строятся по одной выходной плоскости, чтобы не держать 27 копий слоя"""
+    out = np.empty(tuple(size - 2 for size in padded.shape), dtype=padded.dtype)
+    for z in range(out.shape[0]):
+        windows = np.lib.stride_tricks.sliding_window_view(padded[z:z + 3], (3, 3, 3))[0]
+        windows = windows.reshape(windows.shape[:2] + (27,))
+        out[z] = np.partition(windows, 13, axis=-1)[..., 13]
+    return out
+
+
+def sharpen(padded: np.ndarray) -> np.ndarray:
+    """Нерезкое маскирование: x + amount * (x - gaussian(x))"""
+    center = padded[tuple(slice(GAUSSIAN_RADIUS, -GAUSSIAN_RADIUS) for _ in range(3))].astype(np.float32)
+    return center + SHARPEN_AMOUNT * (center - gaussian(padded))
+
+
+# Имя фильтра -> (функция над блоком с полями, радиус поля в вокселях)
+FILTERS: Dict[str, Tuple[Callable[[np.ndarray], np.ndarray], int]] = {
+    'gaussian': (gaussian, GAUSSIAN_RADIUS),
+    'median': (median, 1),
+    'sharpen': (sharpen, GAUSSIAN_RADIUS),
+}
+
+
+def validate_filter(name: str) -> str:
+    """Проверяет имя фильтра"""
+    if name not in FILTERS:
+        raise ValueError(f"Неизвестный фильтр: {name}. Допустимые значения: {', '.join(FILTERS)}")
+    return name
+
+
+def filter_block(data: np.ndarray, name: str, axis: int, start: int, stop: int) -> np.ndarray:
+    """
+    Отфильтрованные плоскости [start, stop) вдоль оси массива axis.
+
+    Читаются только эти плоскости и halo плоскостей с каждой стороны;
+    по остальным осям и за границами объема поле дополняется крайними значениями.
+    """
+    func, halo = FILTERS[validate_filter(name)]
+    size = data.shape[axis]
+    low, high = max(start - halo, 0), min(stop + halo, size)
+
+    selector = [slice(None)] * 3
+    selector[axis] = slice(low, high)
+    block = np.asarray(data[tuple(selector)])
+
+    padding = [(halo, halo)] * 3
+    padding[axis] = (halo - (start - low), halo - (high - stop))
+    filtered = func(np.pad(block, padding, mode='edge'))
+
+    if np.issubdtype(data.dtype, np.integer):
+        info = np.iinfo(data.dtype)
+        filtered = np.clip(np.rint(filtered), info.min, info.max)
+    return filtered.astype(data.dtype, copy=False)
+
+
+class FilteredVolume:
+    """Отфильтрованное представление объема: срезы и толстые слои собираются из кэшированных слоев"""
+
+    def __init__(self, volume: ArrayVolume, name: str, cache_key: Hashable, cache: RenderCache = filter_cache):
+        self.volume = volume
+        self.name = validate_filter(name)
+        self.cache_key = cache_key
+        self.cache = cache
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.volume.shape
+
+    @property
+    def spacing(self) -> Tuple[float, float, float]:
+        return self.volume.spacing
+
+    def _chunk(self, axis: int, number: int) -> np.ndarray:
+        key = self.cache_key + (self.name, axis, number)
+        chunk = self.cache.get(key)
+        if chunk is None:
+            start = number * FILTER_CHUNK
+            stop = min(start + FILTER_CHUNK, self.shape[axis])
+            if axis == 0:
+                self.volume.will_need(max(start - FILTERS[self.name][1], 0), stop + FILTERS[self.name][1])
+            chunk = filter_block(self.volume.data, self.name, axis, start, stop)
+            chunk.flags.writeable = False
+            self.cache.put(key, chunk, chunk.nbytes)
+        return chunk
+
+    def planes(self, axis: str, start: int, stop: int) -> np.ndarray:
+        """Отфильтрованные плоскости [start, stop) вдоль оси в раскладке (z, y, x)"""
+        array_axis = AXES.index(validate_axis(axis))
+        parts = []
+        for number in range(start // FILTER_CHUNK, (stop - 1) // FILTER_CHUNK + 1):
+            chunk_start = number * FILTER_CHUNK
+            selector = [slice(None)] * 3
+            selector[array_axis] = slice(max(start - chunk_start, 0), stop - chunk_start)
+            parts.append(self._chunk(array_axis, number)[tuple(selector)])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=array_axis)
+
+    def plane(self, axis: str, index: int) -> np.ndarray:
+        """Отфильтрованный ортогональный срез"""
+        count = plane_count(self.shape, axis)
+        if not 0 <= index < count:
+            raise IndexError(f"Срез {index} вне диапазона 0..{count - 1}")
+        return np.take(self.planes(axis, index, index + 1), 0, axis=AXES.index(axis))
+
+    def plane_region(self, axis: str, index: int, rows: Tuple[int, int], cols: Tuple[int, int]) -> np.ndarray:
+        """Прямоугольник отфильтрованного среза"""
+        return self.plane(axis, index)[rows[0]:rows[1], cols[0]:cols[1]]
+
+    def slab(self, axis: str, center: int, thickness: int, mode: str = 'mip') -> np.ndarray:
+        """Проекция толстого слоя по отфильтрованным плоскостям"""
+        if mode not in SLAB_MODES:
+            raise ValueError(f"Неизвестный режим проекции: {mode}. Допустимые значения: {', '.join(SLAB_MODES)}")
+        start, stop = slab_range(plane_count(self.shape, axis), center, thickness)
+        projected = SLAB_MODES[mode](self.planes(axis, start, stop), axis=AXES.index(axis))
+        if mode == 'avg':
+            projected = np.rint(projected)
+        return projected.astype(self.volume.data.dtype, copy=False)
+
+
+def filtered_level(path: str, level: int, name: str) -> FilteredVolume:
+    """Уровень пирамиды объема через фильтр name; слои фильтруются при первом обращении"""
+    return FilteredVolume(open_level(path, level), name, volume_key(path) + (level,))
@@ -0,0 +1,173 @@
+"""
+Измерения в области интереса (ROI): среднее, СКО, min/max, перцентили и гистограмма
+
+Плоские области (прямоугольник, эллипс, многоугольник) задаются на срезе в
+координатах изображения среза (u - столбец, v - строка), сфера - в вокселях
+объема (x, y, z). Центр вокселя i имеет координату i. Из memory map читается
+только ограничивающий блок области, маска строится векторно по центрам вокселей.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from services.volume_mpr import validate_axis
+from services.volume_reader import ArrayVolume
+from services.volume_stats import PERCENTILES
+
+ROI_SHAPES = ('rect', 'ellipse', 'polygon', 'sphere')
+
+DEFAULT_ROI_BINS = 64
+MAX_ROI_BINS = 4096
+
+# Сколько аксиальных плоскостей сферы обрабатывается за один проход
+ROI_CHUNK = 32
+
+
+def parse_coords(value: str) -> List[float]:
+    """Разбор списка чисел 'a,b,c,...'"""
+    try:
+        coords = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError(f"Некорректные координаты: {value}")
+    if not np.all(np.isfinite(coords)):
+        raise ValueError(f"Координаты и радиусы должны быть конечными числами: {value}")
+    return coords
+
+
+def _span(low: float, high: float, limit: int) -> Tuple[int, int]:
+    """Индексы вокселей [start, stop), центры которых могут попасть в [low, high]"""
+    start = min(max(int(np.ceil(low)), 0), limit)
+    stop = min(max(int(np.floor(high)) + 1, 0), limit)
+    return start, stop
+
+
+def polygon_mask(uu: np.ndarray, vv: np.ndarray, vertices: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """Точки внутри многоугольника по правилу чет-нечет, векторно по всем точкам сразу"""
+    inside = np.zeros(np.broadcast(uu, vv).shape, dtype=bool)
+    for (u1, v1), (u2, v2) in zip(vertices, vertices[1:] + vertices[:1]):
+        if v1 == v2:
+            continue
+        # Ребро пересекает горизонтальный луч вправо от точки
+        crosses = (v1 > vv) != (v2 > vv)
+        u_cross = u1 + (vv - v1) * (u2 - u1) / (v2 - v1)
+        inside ^= crosses & (uu < u_cross)
+    return inside
+
+
+def _plane_values(volume: ArrayVolume, shape: str, axis: str, index: int, coords: List[float]) -> np.ndarray:
+    validate_axis(axis)
+    depth, height, width = volume.shape
+    rows, columns = {
+        'axial': (height, width),
+        'coronal': (depth, width),
+        'sagittal': (depth, height),
+    }[axis]
+
+    if shape == 'rect':
+        if len(coords) != 4:
+            raise ValueError("Прямоугольник задается углами u0,v0,u1,v1")
+        u0, v0, u1, v1 = coords
+        u = _span(min(u0, u1), max(u0, u1), columns)
+        v = _span(min(v0, v1), max(v0, v1), rows)
+        return volume.plane_region(axis, index, v, u).ravel()
+
+    if shape == 'ellipse':
+        if len(coords) != 4 or coords[2] <= 0 or coords[3] <= 0:
+            raise ValueError("Эллипс задается центром и положительными полуосями cu,cv,ru,rv")
+        cu, cv, ru, rv = coords
+        u = _span(cu - ru, cu + ru, columns)
+        v = _span(cv - rv, cv + rv, rows)
+        vv, uu = np.ogrid[v[0]:v[1], u[0]:u[1]]
+        mask = ((uu - cu) / ru) ** 2 + ((vv - cv) / rv) ** 2 <= 1.0
+    else:
+        if len(coords) < 6 or len(coords) % 2:
+            raise ValueError("Многоугольник задается не менее чем тремя вершинами u,v")
+        vertices = list(zip(coords[0::2], coords[1::2]))
+        us, vs = coords[0::2], coords[1::2]
+        u = _span(min(us), max(us), columns)
+        v = _span(min(vs), max(vs), rows)
+        vv, uu = np.ogrid[v[0]:v[1], u[0]:u[1]]
+        mask = polygon_mask(uu, vv, vertices)
+
+    return volume.plane_region(axis, index, v, u)[mask]
+
+
+def _sphere_values(volume: ArrayVolume, coords: List[float]) -> np.ndarray:
+    if len(coords) != 4 or coords[3] <= 0:
+        raise ValueError("Сфера задается центром и положительным радиусом x,y,z,r (вокселы)")
+    cx, cy, cz, radius = coords
+    depth, height, width = volume.shape
+    x = _span(cx - radius, cx + radius, width)
+    y = _span(cy - radius, cy + radius, height)
+    z = _span(cz - radius, cz + radius, depth)
+
+    yy, xx = np.ogrid[y[0]:y[1], x[0]:x[1]]
+    disc = (xx - cx) ** 2 + (yy - cy) ** 2
+    values = []
+    for start in range(z[0], z[1], ROI_CHUNK):
+        stop = min(start + ROI_CHUNK, z[1])
+        volume.will_need(stop, stop + ROI_CHUNK)
+        zz = np.arange(start, stop)[:, None, None]
+        mask = disc[None] + (zz - cz) ** 2 <= radius ** 2
+        values.append(np.asarray(volume.data[start:stop, y[0]:y[1], x[0]:x[1]])[mask])
+    return np.concatenate(values) if values else np.empty(0, dtype=volume.data.dtype)
+
+
+def region_values(volume: ArrayVolume, shape: str, coords: List[float], axis: str = 'axial', index: int = 0) -> np.ndarray:
+    """Значения вокселей, центры которых лежат в области"""
+    if shape not in ROI_SHAPES:
+        raise ValueError(f"Неизвестная область: {shape}. Допустимые значения: {', '.join(ROI_SHAPES)}")
+    if shape == 'sphere':
+        return _sphere_values(volume, coords)
+    return _plane_values(volume, shape, axis, index, coords)
+
+
+def measure_region(
+    volume: ArrayVolume,
+    shape: str,
+    coords: List[float],
+    axis: str = 'axial',
+    index: int = 0,
+    bins: int = DEFAULT_ROI_BINS,
+    slope: float = 1.0,
+    intercept: float = 0.0
+) -> Dict:
+    """
+    Статистика области в единицах value * slope + intercept (например, HU-подобная шкала).
+
+    Для плоских областей добавляется площадь в мм², для сферы - объем в мм³.
+    Гистограмма из bins корзин покрывает диапазон [min, max] области.
+    """
+    if not 1 <= bins <= MAX_ROI_BINS:
+        raise ValueError(f"Число корзин должно быть от 1 до {MAX_ROI_BINS}")
+    if not (np.isfinite(slope) and np.isfinite(intercept)):
+        raise ValueError("Наклон и сдвиг шкалы должны быть конечными числами")
+
+    values = region_values(volume, shape, coords, axis, index)
+    if values.size == 0:
+        raise ValueError("Область пуста или лежит вне объема")
+    values = values.astype(np.float64) * slope + intercept
+
+    low, high = float(values.min()), float(values.max())
+    histogram, edges = np.histogram(values, bins=bins, range=(low, high))
+    percentiles = np.percentile(values, PERCENTILES)
+
+    sz, sy, sx = volume.spacing
+    result = {
+        'shape': shape,
+        'count': int(values.size),
+        'min': low,
+        'max': high,
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'percentiles': {str(p): float(value) for p, value in zip(PERCENTILES, percentiles)},
+        'histogram_min': float(edges[0]),
+        'histogram_bin_width': float(edges[1] - edges[0]),
+        'histogram': histogram.tolist(),
+    }
+    if shape == 'sphere':
+        result['volume_mm3'] = values.size * sz * sy * sx
+    else:
+        pixel_area = {'axial': sy * sx, 'coronal': sz * sx, 'sagittal': sz * sy}[axis]
+        result['area_mm2'] = values.size * pixel_area
+    return result
@@ -0,0 +1,278 @@
+"""
+Изоповерхности объема: извлечение сетки по порогу, упрощение и компактная упаковка
+
+Сетка строится marching cubes из scikit-image, если пакет установлен; иначе -
+встроенным алгоритмом surface nets на numpy (вершина на каждую пересекающую ячейку,
+четырехугольник на каждое ребро с переходом через порог). Упрощение до бюджета
+треугольников - кластеризацией вершин по сетке.
+
+Бинарный формат ответа:
+    [uint32 длина][JSON заголовок, кратно 4 байтам]
+    позиции  - uint16 (x, y, z) на вершину, квантованы в пределах bounds (мм)
+    индексы  - uint16 или uint32 по три на треугольник, с выравниванием до 4 байт
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from skimage.measure import marching_cubes
+except ImportError:
+    marching_cubes = None
+
+from services.render_cache import RenderCache
+from services.volume_pyramid import open_level
+from services.volume_reader import volume_key
+from services.volume_stats import compute_stats, get_stats
+from services.volume_stream import pack_header
+
+logger = logging.getLogger(__name__)
+
+# 50 тыс. треугольников - около 25 тыс. вершин, индексы помещаются в uint16 (~450 КБ)
+DEFAULT_TRIANGLE_BUDGET = 50_000
+MAX_TRIANGLE_BUDGET = 2_000_000
+
+# Сколько слоев ячеек surface nets обрабатывается за один проход
+MESH_CHUNK = 32
+
+MESH_CACHE_BYTES = int(os.getenv("MESH_CACHE_BYTES", str(128 * 1024 * 1024)))
+
+# Готовые (упакованные) сетки: ключ - (объем, порог, уровень, бюджет)
+mesh_cache = RenderCache(MESH_CACHE_BYTES)
+# Построение сетки загружает все ядра numpy, параллельные построения только мешают
+_build_lock = threading.Lock()
+
+# Углы ячейки (z, y, x) и 12 ребер как пары номеров углов
+CORNERS = np.array([(z, y, x) for z in (0, 1) for y in (0, 1) for x in (0, 1)])
+EDGES = [
+    (a, b) for a in range(8) for b in range(a + 1, 8)
+    if np.abs(CORNERS[a] - CORNERS[b]).sum() == 1
+]
+
+
+def _cell_vertices(block: np.ndarray, threshold: float, cells: Tuple[int, int, int]):
+    """Активные ячейки слоя и их вершины - средние точки пересечения ребер с порогом"""
+    inside = block > threshold
+    depth = block.shape[0] - 1
+    corners = np.zeros((depth, cells[1], cells[2]), dtype=np.uint8)
+    for dz, dy, dx in CORNERS:
+        corners += inside[dz:dz + depth, dy:dy + cells[1], dx:dx + cells[2]]
+    cz, cy, cx = np.nonzero((corners > 0) & (corners < 8))
+
+    total = np.zeros((cz.size, 3), dtype=np.float32)
+    count = np.zeros(cz.size, dtype=np.float32)
+    for a, b in EDGES:
+        va = block[cz + CORNERS[a][0], cy + CORNERS[a][1], cx + CORNERS[a][2]]
+        vb = block[cz + CORNERS[b][0], cy + CORNERS[b][1], cx + CORNERS[b][2]]
+        crossing = (va > threshold) != (vb > threshold)
+        t = np.where(crossing, (threshold - va) / np.where(crossing, vb - va, 1), 0)
+        total[crossing] += CORNERS[a] + t[crossing, None] * (CORNERS[b] - CORNERS[a])
+        count += crossing
+
+    positions = total / count[:, None] + np.stack([cz, cy, cx], axis=1)
+    return (cz, cy, cx), positions
+
+
+def _edge_quads(inside: np.ndarray, z0: int, shape: Tuple[int, int, int]) -> np.ndarray:
+    """
+    Четырехугольники (номера ячеек) вокруг ребер с переходом через порог.
+
+    Ребро принадлежит слою по z его начального вокселя; ячейки вокруг ребер
+    на границе объема не существуют, такие ребра пропускаются.
+    """
+    cells = tuple(size - 1 for size in shape)
+    depth = inside.shape[0] - 1
+    quads = []
+    for axis in range(3):
+        first = [slice(0, depth), slice(None), slice(None)]
+        second = [slice(0, depth), slice(None), slice(None)]
+        if axis == 0:
+            second[0] = slice(1, depth + 1)
+        else:
+            first[axis] = slice(0, -1)
+            second[axis] = slice(1, None)
+        a = inside[tuple(first)]
+        p = list(np.nonzero(a != inside[tuple(second)]))
+        flip = a[tuple(p)]
+        p[0] = p[0] + z0
+
+        i, j = (axis + 1) % 3, (axis + 2) % 3
+        valid = (p[i] >= 1) & (p[i] < cells[i]) & (p[j] >= 1) & (p[j] < cells[j]) & (p[axis] < cells[axis])
+        p = [coord[valid] for coord in p]
+        flip = flip[valid]
+
+        ring = []
+        for di, dj in ((0, 0), (1, 0), (1, 1), (0, 1)):
+            cell = list(p)
+            cell[i] = cell[i] - di
+            cell[j] = cell[j] - dj
+            ring.append(np.ravel_multi_index(cell, cells))
+        ring = np.stack(ring, axis=1)
+        # Обход согласован по всем ребрам: в координатах (x, y, z) нормали смотрят
+        # наружу из области выше порога
+        ring[flip] = ring[flip][:, ::-1]
+        quads.append(ring)
+    return np.concatenate(quads)
+
+
+def surface_nets(data: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Сетка изоповерхности: вершины (z, y, x) в вокселях и треугольники"""
+    shape = tuple(int(size) for size in data.shape)
+    if min(shape) < 2:
+        raise ValueError("Объем слишком мал для построения поверхности")
+    cells = tuple(size - 1 for size in shape)
+
+    cell_ids, positions, quads = [], [], []
+    for z0 in range(0, cells[0], MESH_CHUNK):
+        z1 = min(z0 + MESH_CHUNK, cells[0])
+        block = np.asarray(data[z0:z1 + 1], dtype=np.float32)
+        (cz, cy, cx), block_positions = _cell_vertices(block, threshold, cells)
+        cell_ids.append(np.ravel_multi_index((cz + z0, cy, cx), cells))
+        positions.append(block_positions + (z0, 0, 0))
+        quads.append(_edge_quads(block > threshold, z0, shape))
+
+    cell_ids = np.concatenate(cell_ids)
+    vertices = np.concatenate(positions).astype(np.float32)
+    # Ячейки идут по возрастанию номера, поэтому номер вершины - позиция в cell_ids
+    quads = np.searchsorted(cell_ids, np.concatenate(quads))
+    triangles = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+    return vertices, triangles
+
+
+def extract_surface(data: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Вершины (z, y, x) в вокселях и треугольники изоповерхности"""
+    if marching_cubes is not None:
+        # Обход треугольников marching cubes совпадает с surface nets: нормали после
+        # перевода вершин в (x, y, z) смотрят наружу
+        try:
+            vertices, triangles, _, _ = marching_cubes(np.asarray(data), level=threshold)
+        except RuntimeError:
+            # Порог не пересекает данные (например, равен максимуму) - пустая сетка, как у surface nets
+            return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int64)
+        return vertices.astype(np.float32), triangles
+    return surface_nets(data, threshold)
+
+
+def _cluster(vertices: np.ndarray, triangles: np.ndarray, cell: float) -> Tuple[np.ndarray, np.ndarray]:
+    origin = vertices.min(axis=0)
+    grid = np.floor((vertices - origin) / cell).astype(np.int64)
+    _, cluster = np.unique(grid, axis=0, return_inverse=True)
+    cluster = cluster.ravel()
+
+    count = np.bincount(cluster).astype(np.float32)
+    merged = np.stack([
+        np.bincount(cluster, weights=vertices[:, axis]) / count for axis in range(3)
+    ], axis=1).astype(np.float32)
+
+    remapped = cluster[triangles]
+    keep = (
+        (remapped[:, 0] != remapped[:, 1])
+        & (remapped[:, 1] != remapped[:, 2])
+        & (remapped[:, 0] != remapped[:, 2])
+    )
+    remapped = remapped[keep]
+    # Одинаковые треугольники после слияния оставляем один раз
+    _, unique = np.unique(np.sort(remapped, axis=1), axis=0, return_index=True)
+    return merged, remapped[np.sort(unique)]
+
+
+def decimate(vertices: np.ndarray, triangles: np.ndarray, budget: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Упрощение кластеризацией вершин: ячейка растет, пока треугольников больше бюджета"""
+    if len(triangles) <= budget:
+        return vertices, triangles
+
+    edges = vertices[triangles[:, 1]] - vertices[triangles[:, 0]]
+    mean_edge = float(np.linalg.norm(edges, axis=1).mean()) or 1.0
+    # Число треугольников убывает примерно как квадрат размера ячейки
+    cell = mean_edge * np.sqrt(len(triangles) / budget)
+    while True:
+        merged, reduced = _cluster(vertices, triangles, cell)
+        if len(reduced) <= budget:
+            break
+        cell *= 1.2
+
+    used = np.unique(reduced)
+    remap = np.zeros(len(merged), dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return merged[used], remap[reduced]
+
+
+def pack_mesh(vertices: np.ndarray, triangles: np.ndarray, info: Dict) -> bytes:
+    """Упаковывает сетку (вершины x, y, z в мм) в бинарный формат модуля"""
+    if len(vertices):
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+    else:
+        low, high = np.zeros(3, dtype=np.float32), np.zeros(3, dtype=np.float32)
+    scale = np.where(high > low, high - low, 1.0)
+    positions = np.rint((vertices - low) / scale * 65535).astype('<u2')
+
+    index_dtype = np.dtype('<u2') if len(vertices) <= 65536 else np.dtype('<u4')
+    positions_bytes = positions.tobytes()
+    padding = b'\0' * (-len(positions_bytes) % 4)
+
+    header = pack_header(dict(info, **{
+        'vertex_count': int(len(vertices)),
+        'triangle_count': int(len(triangles)),
+        'bounds': [low.tolist(), high.tolist()],
+        'position_dtype': 'uint16',
+        'index_dtype': index_dtype.name,
+        'positions_offset': 0,
+        'indices_offset': len(positions_bytes) + len(padding),
+    }), align=4)
+    return header + positions_bytes + padding + triangles.astype(index_dtype).tobytes()
+
+
+def build_mesh(
+    data: np.ndarray,
+    threshold: float,
+    spacing: Tuple[float, float, float],
+    budget: int = DEFAULT_TRIANGLE_BUDGET
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Изоповерхность, упрощенная до budget треугольников; вершины (x, y, z) в мм"""
+    vertices, triangles = extract_surface(data, threshold)
+    vertices, triangles = decimate(vertices, triangles, budget)
+    return vertices[:, ::-1] * np.asarray(spacing[::-1], dtype=np.float32), triangles
+
+
+def validate_budget(budget: Optional[int]) -> int:
+    budget = DEFAULT_TRIANGLE_BUDGET if budget is None else budget
+    if not 1 <= budget <= MAX_TRIANGLE_BUDGET:
+        raise ValueError(f"Бюджет треугольников должен быть от 1 до {MAX_TRIANGLE_BUDGET}")
+    return budget
+
+
+def default_threshold(path: str, level: int) -> int:
+    """
+    Порог по умолчанию - 99-й перцентиль выбранного уровня пирамиды (кость, зубы).
+
+    Уровни - средние блоков 2x2x2, их диапазон уже исходного, поэтому перцентиль
+    исходного объема может лежать выше максимума уровня.
+    """
+    if level == 0:
+        return get_stats(path)['percentiles']['99']
+    return compute_stats(open_level(path, level).data)['percentiles']['99']
+
+
+def get_mesh(path: str, threshold: int, level: int, budget: int = DEFAULT_TRIANGLE_BUDGET) -> bytes:
+    """Упакованная сетка изоповерхности уровня пирамиды через общий кэш"""
+    key = volume_key(path) + ('mesh', threshold, level, budget)
+    mesh = mesh_cache.get(key)
+    if mesh is not None:
+        return mesh
+
+    with _build_lock:
+        mesh = mesh_cache.get(key)
+        if mesh is None:
+            volume = open_level(path, level)
+            logger.info(f"Строим изоповерхность {threshold} уровня {level} для {path}")
+            vertices, triangles = build_mesh(volume.data, threshold, volume.spacing, budget)
+            mesh = pack_mesh(vertices, triangles, {
+                'threshold': threshold,
+                'level': level,
+                'spacing': list(volume.spacing),
+            })
+            mesh_cache.put(key, mesh, len(mesh))
+    return mesh
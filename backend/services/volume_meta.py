@@ -0,0 +1,226 @@
+"""
+Геометрия .vol объемов по метаданным OneVolumeViewer: VolumeId.xml и ver_ctrl.txt
+
+Структура архива OneVolumeViewer:
+    ver_ctrl.txt             - пациент и параметры съемки (строки вида Key="value")
+    CT_<дата>/VolumeId.xml   - радиус объема и размер вокселя (dmmVolumeRadius, dmmVoxelSize)
+    CT_<дата>/CT_0.vol       - заголовок и кубический объем uint16
+
+Размер куба берется как диаметр объема в вокселях, заголовок - остаток файла.
+Без метаданных сначала проверяется прежний формат (заголовок 512 байт и не более
+512 срезов 512x512 ровно по размеру файла), затем куб подбирается по размеру файла.
+
+Тип данных не определяется: метаданные OneVolumeViewer его не содержат (OVVParser
+на клиенте тоже считает объем 16-битным), а статистика, таблицы окна и бинарные
+ответы рассчитаны на uint16. Поэтому dtype всегда VOL_DTYPE; файл другого типа
+не совпадет по размеру с кубом из VolumeId.xml, и это попадет в лог.
+"""
+import logging
+import os
+import re
+import threading
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VOLUME_ID_NAME = 'VolumeId.xml'
+VER_CTRL_NAME = 'ver_ctrl.txt'
+
+# Формат по умолчанию: заголовок 512 байт, далее срезы 512x512 uint16 (little-endian).
+# VOL_DTYPE - единственный поддерживаемый тип, см. описание модуля
+VOL_HEADER_SIZE = 512
+VOL_SLICE_SHAPE = (512, 512)
+VOL_DTYPE = np.dtype('<u2')
+
+# Заголовки больше этого считаем признаком неверно определенных размеров
+MAX_HEADER_SIZE = 64 * 1024
+
+VER_CTRL_LINE = re.compile(r'(\w+)\s*=\s*"([^"]*)"')
+
+
+def find_sidecar(path: str, name: str) -> Optional[str]:
+    """Файл метаданных рядом с объемом или уровнем выше (корень архива)"""
+    directory = os.path.dirname(os.path.realpath(path))
+    for search_dir in (directory, os.path.dirname(directory)):
+        candidate = os.path.join(search_dir, name)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def parse_volume_id(path: str) -> Dict:
+    """Радиус объема, размер вокселя и центр из элемента V0 в VolumeId.xml (мм)"""
+    root = ElementTree.parse(path).getroot()
+    v0 = root if root.tag == 'V0' else root.find('.//V0')
+    if v0 is None:
+        raise ValueError(f"Не найден элемент V0 в {path}")
+
+    def value(tag: str) -> Optional[float]:
+        element = v0.find(tag)
+        if element is None or element.get('value') is None:
+            return None
+        return float(element.get('value'))
+
+    center = v0.find('dmmVolumeCenter')
+    filter_name = v0.find('strReconstructionFilterSetName')
+    return {
+        'radius': value('dmmVolumeRadius'),
+        'voxel_size': value('dmmVoxelSize'),
+        'center': [float(center.get(axis, 0)) for axis in 'XYZ'] if center is not None else None,
+        'filter': filter_name.get('value', '') if filter_name is not None else '',
+        'guid': v0.get('strGuid', ''),
+    }
+
+
+def parse_ver_ctrl(path: str) -> Dict:
+    """
+    Поля ver_ctrl.txt как словарь строк.
+
+    Технические параметры из комментария (kV, mA, SliceInterval, SliceThickness,
+    PixelSpacing) добавляются числами под ключом 'technical'.
+    """
+    fields = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = VER_CTRL_LINE.search(line)
+            if match:
+                fields[match.group(1)] = match.group(2)
+
+    comment = ' '.join(fields.values())
+    technical = {}
+    for name, pattern in (
+        ('kv', r'kV:([0-9.]+)'),
+        ('ma', r'mA:([0-9.]+)'),
+        ('slice_interval', r'SliceInterval:([0-9.]+)mm'),
+        ('slice_thickness', r'SliceThickness:([0-9.]+)mm'),
+        ('pixel_spacing', r'PixelSpacing:([0-9.]+)'),
+    ):
+        match = re.search(pattern, comment)
+        if match:
+            technical[name] = float(match.group(1))
+    fields['technical'] = technical
+    return fields
+
+
+def _cube_layout(file_size: int, itemsize: int, side: int) -> Optional[int]:
+    """Размер заголовка, если в файл помещается куб side³ с допустимым заголовком"""
+    if side <= 0:
+        return None
+    header_size = file_size - side ** 3 * itemsize
+    if 0 <= header_size <= MAX_HEADER_SIZE:
+        return header_size
+    return None
+
+
+def detect_geometry(path: str) -> Dict:
+    """
+    Определяет раскладку .vol файла: заголовок, форма (z, y, x), шаг вокселя (мм), тип данных.
+
+    Тип данных не определяется по файлу и всегда равен VOL_DTYPE (uint16).
+    Источник ('volume_id', 'file_size', 'default') показывает, чем определена форма.
+    """
+    file_size = os.path.getsize(path)
+    itemsize = VOL_DTYPE.itemsize
+
+    volume_id, ver_ctrl = None, None
+    volume_id_path = find_sidecar(path, VOLUME_ID_NAME)
+    ver_ctrl_path = find_sidecar(path, VER_CTRL_NAME)
+    try:
+        if volume_id_path:
+            volume_id = parse_volume_id(volume_id_path)
+        if ver_ctrl_path:
+            ver_ctrl = parse_ver_ctrl(ver_ctrl_path)
+    except (OSError, ValueError, ElementTree.ParseError) as e:
+        logger.warning(f"Не удалось разобрать метаданные объема {path}: {e}")
+
+    voxel_size = None
+    side, source = None, None
+    if volume_id and volume_id['radius'] and volume_id['voxel_size']:
+        voxel_size = volume_id['voxel_size']
+        side = int(round(2 * volume_id['radius'] / voxel_size))
+        header_size = _cube_layout(file_size, itemsize, side)
+        if header_size is not None:
+            source = 'volume_id'
+        else:
+            logger.warning(
+                f"Размер {path} не соответствует кубу {side}³ {VOL_DTYPE.name} из {VOLUME_ID_NAME}, "
+                f"определяем размеры по размеру файла"
+            )
+
+    slice_bytes = VOL_SLICE_SHAPE[0] * VOL_SLICE_SHAPE[1] * itemsize
+    legacy_depth, legacy_tail = divmod(file_size - VOL_HEADER_SIZE, slice_bytes)
+    if source is None and legacy_tail == 0 and 0 < legacy_depth <= VOL_SLICE_SHAPE[0]:
+        # Срезы 512x512 ровно заполняют файл - прежний формат (включая куб 512³)
+        source = 'default'
+
+    if source is None:
+        side = int(round((file_size / itemsize) ** (1 / 3)))
+        # Заголовок уменьшает файл, поэтому проверяем и ближайший меньший куб
+        for candidate in (side, side - 1):
+            header_size = _cube_layout(file_size, itemsize, candidate)
+            if header_size is not None:
+                side, source = candidate, 'file_size'
+                break
+
+    if source in ('volume_id', 'file_size'):
+        shape = (side, side, side)
+    else:
+        source = 'default'
+        header_size = VOL_HEADER_SIZE
+        shape = (max(legacy_depth, 0),) + VOL_SLICE_SHAPE
+
+    if voxel_size is None and ver_ctrl:
+        technical = ver_ctrl['technical']
+        voxel_size = technical.get('pixel_spacing') or technical.get('slice_interval')
+    spacing = (voxel_size,) * 3 if voxel_size else (1.0, 1.0, 1.0)
+
+    return {
+        'header_size': header_size,
+        'shape': shape,
+        'spacing': spacing,
+        'dtype': VOL_DTYPE,
+        'source': source,
+        'volume_id': volume_id,
+        'ver_ctrl': ver_ctrl,
+    }
+
+
+class GeometryCache:
+    """Геометрия объемов в памяти, ключ - (путь, mtime); метаданные читаются один раз"""
+
+    def __init__(self):
+        self._geometry = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, mtime_ns: Optional[int] = None) -> Dict:
+        path = os.path.realpath(path)
+        if mtime_ns is None:
+            mtime_ns = os.stat(path).st_mtime_ns
+        key = (path, mtime_ns)
+
+        geometry = self._geometry.get(key)
+        if geometry is not None:
+            return geometry
+
+        geometry = detect_geometry(path)
+        with self._lock:
+            for stale_key in [k for k in self._geometry if k[0] == path]:
+                del self._geometry[stale_key]
+            self._geometry[key] = geometry
+        return geometry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._geometry.clear()
+
+
+geometry_cache = GeometryCache()
+
+
+def get_geometry(path: str, mtime_ns: Optional[int] = None) -> Dict:
+    """Геометрия .vol объема через общий кэш"""
+    return geometry_cache.get(path, mtime_ns)
+
@@ -0,0 +1,184 @@
+"""
+Многоуровневая пирамида объема (2x, 4x, 8x) для быстрых превью
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+import numpy as np
+
+from services.volume_reader import MAX_OPEN_VOLUMES, ArrayVolume, open_volume
+
+logger = logging.getLogger(__name__)
+
+# Уровень 0 - исходный объем, уровень n - уменьшение в 2**n раз по каждой оси
+MAX_LEVEL = 3
+
+# Сколько выходных плоскостей считается за один проход при уменьшении
+DOWNSAMPLE_CHUNK = 8
+
+PYRAMID_SUFFIX = '.pyramid'
+
+
+def validate_level(level: int) -> int:
+    """Проверяет номер уровня пирамиды"""
+    if not 0 <= level <= MAX_LEVEL:
+        raise ValueError(f"Уровень пирамиды должен быть от 0 до {MAX_LEVEL}")
+    return level
+
+
+def level_shape(shape: Tuple[int, int, int], level: int) -> Tuple[int, int, int]:
+    """Размер объема на уровне пирамиды"""
+    return tuple(max(size >> level, 1) for size in shape)
+
+
+def _pair_sum(block: np.ndarray, axis: int) -> np.ndarray:
+    """Сумма соседних пар вдоль оси; ось из одного элемента удваивается"""
+    size = block.shape[axis]
+    if size < 2:
+        return block * 2
+    even = [slice(None)] * block.ndim
+    odd = [slice(None)] * block.ndim
+    even[axis] = slice(0, size - size % 2, 2)
+    odd[axis] = slice(1, size, 2)
+    return block[tuple(even)] + block[tuple(odd)]
+
+
+def downsample(data: np.ndarray, out: np.ndarray) -> None:
+    """
+    Уменьшение объема в 2 раза усреднением блоков 2x2x2.
+
+    Вход читается блоками по DOWNSAMPLE_CHUNK выходных плоскостей, поэтому
+    в памяти одновременно находится лишь небольшой фрагмент исходного объема.
+    """
+    step = 2 if data.shape[0] >= 2 else 1
+    for start in range(0, out.shape[0], DOWNSAMPLE_CHUNK):
+        stop = min(start + DOWNSAMPLE_CHUNK, out.shape[0])
+        block = data[start * step:stop * step].astype(np.uint32)
+        for axis in range(3):
+            block = _pair_sum(block, axis)
+        out[start:stop] = (block + 4) >> 3
+
+
+def pyramid_dir(path: str) -> str:
+    """Каталог с уровнями пирамиды рядом с файлом объема"""
+    return os.path.realpath(path) + PYRAMID_SUFFIX
+
+
+def _level_path(path: str, level: int) -> str:
+    return os.path.join(pyramid_dir(path), f'level{level}.npy')
+
+
+def _read_meta(path: str) -> dict:
+    try:
+        with open(os.path.join(pyramid_dir(path), 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_level(path: str, level: int, source: np.ndarray, mtime_ns: int) -> np.ndarray:
+    """Строит уровень из предыдущего и сохраняет его в .npy рядом с объемом"""
+    shape = level_shape(source.shape, 1)
+    directory = pyramid_dir(path)
+    target = _level_path(path, level)
+    temp = f'{target}.{os.getpid()}.tmp'
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        out = np.lib.format.open_memmap(temp, mode='w+', dtype=source.dtype, shape=shape)
+        downsample(source, out)
+        out.flush()
+        del out
+        os.replace(temp, target)
+
+        meta = _read_meta(path)
+        if meta.get('mtime_ns') != mtime_ns:
+            meta = {'mtime_ns': mtime_ns, 'levels': []}
+        meta['levels'] = sorted(set(meta['levels']) | {level})
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        return np.load(target, mmap_mode='r')
+    except OSError as e:
+        # Каталог недоступен для записи - держим уровень только в памяти
+        logger.warning(f"Не удалось сохранить уровень {level} пирамиды для {path}: {e}")
+        if os.path.exists(temp):
+            os.remove(temp)
+        out = np.empty(shape, dtype=source.dtype)
+        downsample(source, out)
+        return out
+
+
+class PyramidCache:
+    """Открытые уровни пирамиды, ключ - (путь, mtime, уровень)"""
+
+    def __init__(self, max_levels: int = MAX_OPEN_VOLUMES * MAX_LEVEL):
+        self.max_levels = max_levels
+        self._levels = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _build_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(path, threading.Lock())
+
+    def _remember(self, key, volume: ArrayVolume) -> None:
+        with self._lock:
+            self._levels[key] = volume
+            while len(self._levels) > self.max_levels:
+                self._levels.popitem(last=False)
+
+    def get(self, path: str, level: int) -> ArrayVolume:
+        """Возвращает уровень пирамиды, при первом обращении строит и сохраняет его"""
+        validate_level(level)
+        volume = open_volume(path)
+        if level == 0:
+            return volume
+
+        key = (volume.path, volume.mtime_ns, level)
+        with self._lock:
+            cached = self._levels.get(key)
+            if cached is not None:
+                self._levels.move_to_end(key)
+                return cached
+
+        # Строим уровни по порядку, каждый из предыдущего
+        with self._build_lock(volume.path):
+            source = volume.data
+            meta = _read_meta(volume.path)
+            for current in range(1, level + 1):
+                current_key = (volume.path, volume.mtime_ns, current)
+                with self._lock:
+                    cached = self._levels.get(current_key)
+                if cached is None:
+                    if meta.get('mtime_ns') == volume.mtime_ns and current in meta.get('levels', []):
+                        data = np.load(_level_path(volume.path, current), mmap_mode='r')
+                    else:
+                        logger.info(f"Строим уровень {current} пирамиды для {volume.path}")
+                        data = _write_level(volume.path, current, source, volume.mtime_ns)
+                    cached = ArrayVolume(data, tuple(step * 2 ** current for step in volume.spacing))
+                    self._remember(current_key, cached)
+                source = cached.data
+
+            return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._levels.clear()
+
+
+pyramid_cache = PyramidCache()
+
+
+def open_level(path: str, level: int) -> ArrayVolume:
+    """Открывает уровень пирамиды объема"""
+    return pyramid_cache.get(path, level)
+
+
+def build_pyramid(path: str) -> None:
+    """Строит все уровни пирамиды заранее (например, при загрузке файла)"""
+    open_level(path, MAX_LEVEL)
@@ -0,0 +1,202 @@
+"""
+Чтение .vol объемов через memory map с общим LRU кэшем открытых файлов
+"""
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from services.volume_bricks import BrickArray, is_bricked
+from services.volume_meta import VOL_DTYPE, VOL_HEADER_SIZE, VOL_SLICE_SHAPE, get_geometry
+from services.volume_mpr import extract_plane, iter_planes, plane_count, project_slab
+
+MAX_OPEN_VOLUMES = int(os.getenv("MAX_OPEN_VOLUMES", "16"))
+
+PAGE_SIZE = mmap.PAGESIZE
+
+
+class ArrayVolume:
+    """Объем поверх готового массива (z, y, x): уровни пирамиды, данные в памяти"""
+
+    def __init__(self, data: np.ndarray, spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0)):
+        self.data = data
+        # Шаг вокселя (z, y, x) в мм
+        self.spacing = tuple(spacing)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.data.shape
+
+    def axial(self, index: int) -> np.ndarray:
+        """Аксиальный срез (view на данные)"""
+        if not 0 <= index < self.data.shape[0]:
+            raise IndexError(f"Срез {index} вне диапазона 0..{self.data.shape[0] - 1}")
+        return self.data[index]
+
+    def will_need(self, start: int, stop: int) -> None:
+        """Подсказка о предстоящем чтении аксиальных срезов [start, stop)"""
+
+    def plane(self, axis: str, index: int) -> np.ndarray:
+        """Ортогональный срез по оси axial/coronal/sagittal"""
+        return extract_plane(self.data, axis, index)
+
+    def plane_region(self, axis: str, index: int, rows: Tuple[int, int], cols: Tuple[int, int]) -> np.ndarray:
+        """
+        Прямоугольник [rows) x [cols) ортогонального среза.
+
+        Для coronal/sagittal строки - аксиальные плоскости, поэтому читаются
+        только плоскости rows, а не весь срез.
+        """
+        count = plane_count(self.data.shape, axis)
+        if not 0 <= index < count:
+            raise IndexError(f"Срез {index} вне диапазона 0..{count - 1}")
+        if axis == 'axial':
+            self.will_need(index, index + 1)
+            return np.asarray(self.data[index, rows[0]:rows[1], cols[0]:cols[1]])
+        self.will_need(*rows)
+        if axis == 'coronal':
+            return np.asarray(self.data[rows[0]:rows[1], index, cols[0]:cols[1]])
+        return np.asarray(self.data[rows[0]:rows[1], cols[0]:cols[1], index])
+
+    def planes(self, axis: str, start: int, stop: int, step: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+        """Срезы диапазона start:stop:step по одному, без загрузки всего диапазона"""
+        return iter_planes(self.data, axis, start, stop, step, will_need=self.will_need)
+
+    def slab(self, axis: str, center: int, thickness: int, mode: str = 'mip') -> np.ndarray:
+        """Проекция толстого слоя вокруг среза center"""
+        return project_slab(self.data, axis, center, thickness, mode, will_need=self.will_need)
+
+
+class MappedVolume(ArrayVolume):
+    """Объем, отображенный в память. Срезы отдаются как view без копирования"""
+
+    def __init__(
+        self,
+        path: str,
+        mtime_ns: int,
+        header_size: int = VOL_HEADER_SIZE,
+        slice_shape: Tuple[int, int] = VOL_SLICE_SHAPE,
+        dtype: np.dtype = VOL_DTYPE,
+        spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+    ):
+        self.path = path
+        self.mtime_ns = mtime_ns
+
+        slice_bytes = slice_shape[0] * slice_shape[1] * np.dtype(dtype).itemsize
+        depth = (os.path.getsize(path) - header_size) // slice_bytes
+        if depth <= 0:
+            raise ValueError(f"Файл слишком мал для объема: {path}")
+
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Читаем только полные срезы, хвост файла игнорируем
+        self.header_size = header_size
+        self.slice_bytes = slice_bytes
+        super().__init__(np.ndarray(
+            (depth,) + tuple(slice_shape),
+            dtype=dtype,
+            buffer=self._mmap,
+            offset=header_size
+        ), spacing)
+
+    def will_need(self, start: int, stop: int) -> None:
+        """Подсказка ядру заранее подчитать аксиальные срезы [start, stop)"""
+        if not hasattr(mmap, 'MADV_WILLNEED'):
+            return
+        start = max(start, 0)
+        stop = min(stop, self.data.shape[0])
+        if start >= stop:
+            return
+
+        begin = self.header_size + start * self.slice_bytes
+        aligned = begin - begin % PAGE_SIZE
+        end = self.header_size + stop * self.slice_bytes
+        self._mmap.madvise(mmap.MADV_WILLNEED, aligned, end - aligned)
+
+    def close(self) -> None:
+        """
+        Закрывает отображение, чтобы файл можно было удалить (на Windows - обязательно).
+
+        Только для объемов вне VolumeCache; срезы-view к этому моменту должны быть освобождены.
+        """
+        self.data = None
+        self._mmap.close()
+
+
+class BrickedVolume(ArrayVolume):
+    """Объем в блочном формате .bvol; читаются только затронутые блоки"""
+
+    def __init__(self, path: str, mtime_ns: int):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        data = BrickArray(path, (path, mtime_ns))
+        super().__init__(data, data.spacing)
+
+
+class VolumeCache:
+    """Ограниченный LRU открытых объемов, ключ - (путь, mtime)"""
+
+    def __init__(self, max_volumes: int = MAX_OPEN_VOLUMES):
+        self.max_volumes = max_volumes
+        self._volumes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> ArrayVolume:
+        """Возвращает открытый объем, при необходимости отображает файл"""
+        path = os.path.realpath(path)
+        key = (path, os.stat(path).st_mtime_ns)
+
+        with self._lock:
+            volume = self._volumes.get(key)
+            if volume is not None:
+                self._volumes.move_to_end(key)
+                return volume
+
+            if is_bricked(path):
+                volume = BrickedVolume(path, key[1])
+            else:
+                # Размеры, заголовок и шаг вокселя - по VolumeId.xml/ver_ctrl.txt или размеру файла
+                geometry = get_geometry(path, key[1])
+                volume = MappedVolume(
+                    path,
+                    key[1],
+                    header_size=geometry['header_size'],
+                    slice_shape=geometry['shape'][1:],
+                    dtype=geometry['dtype'],
+                    spacing=geometry['spacing']
+                )
+
+            # Файл перезаписан - старые отображения больше не нужны
+            for stale_key in [k for k in self._volumes if k[0] == path]:
+                del self._volumes[stale_key]
+
+            self._volumes[key] = volume
+            while len(self._volumes) > self.max_volumes:
+                self._volumes.popitem(last=False)
+
+            return volume
+
+    def clear(self) -> None:
+        with self._lock:
+            self._volumes.clear()
+
+    def __len__(self) -> int:
+        return len(self._volumes)
+
+
+volume_cache = VolumeCache()
+
+
+def open_volume(path: str) -> ArrayVolume:
+    """Открывает объем (.vol или блочный .bvol) через общий кэш"""
+    return volume_cache.get(path)
+
+
+def volume_key(path: str) -> Tuple[str, int]:
+    """Идентификатор версии объема для ключей кэшей: (путь, mtime)"""
+    volume = open_volume(path)
+    return volume.path, volume.mtime_ns
@@ -0,0 +1,75 @@
+"""
+Окно/уровень (window/level) через таблицы uint16 -> uint8
+"""
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+LUT_CACHE_SIZE = int(os.getenv("LUT_CACHE_SIZE", "256"))
+
+# Пресеты окон по перцентилям статистики объема: (нижняя граница, верхняя граница)
+WINDOW_PRESETS = {
+    'full': ('min', 'max'),
+    'auto': ('1', '99'),
+    'soft': ('5', '95'),
+    'bone': ('50', '99.5'),
+}
+
+
+def _stats_value(stats: Dict, name: str) -> int:
+    if name in ('min', 'max'):
+        return stats[name]
+    return stats['percentiles'][name]
+
+
+def resolve_window(
+    stats: Dict,
+    center: Optional[float] = None,
+    width: Optional[float] = None,
+    preset: Optional[str] = None
+) -> Tuple[int, int]:
+    """
+    Центр и ширина окна в единицах объема.
+
+    Явные center/width имеют приоритет над пресетом, по умолчанию - весь диапазон.
+    Значения округляются до целых, чтобы таблицы переиспользовались при перетаскивании.
+    """
+    if center is not None and not np.isfinite(center):
+        raise ValueError(f"Центр окна должен быть конечным числом: {center}")
+    if width is not None and not (np.isfinite(width) and width > 0):
+        raise ValueError(f"Ширина окна должна быть положительным конечным числом: {width}")
+
+    if center is None or width is None:
+        preset = preset or 'full'
+        if preset not in WINDOW_PRESETS:
+            raise ValueError(f"Неизвестный пресет окна: {preset}. Допустимые значения: {', '.join(WINDOW_PRESETS)}")
+        low, high = (_stats_value(stats, name) for name in WINDOW_PRESETS[preset])
+        center = center if center is not None else (low + high) / 2
+        width = width if width is not None else high - low
+
+    if width <= 0:
+        width = 1
+    return int(round(center)), max(int(round(width)), 1)
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def window_lut(center: int, width: int, invert: bool = False, gamma: float = 1.0) -> np.ndarray:
+    """Таблица из 65536 значений uint8 для окна (center, width); только для чтения"""
+    low = center - width / 2
+    values = np.arange(65536, dtype=np.float64)
+    scaled = np.clip((values - low) / width, 0.0, 1.0)
+    if gamma != 1.0:
+        scaled **= 1.0 / gamma
+    if invert:
+        scaled = 1.0 - scaled
+
+    lut = np.rint(scaled * 255).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def apply_window(plane: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """uint16 срез -> uint8 одной выборкой из таблицы, без float временных массивов"""
+    return np.take(lut, plane)
@@ -0,0 +1,140 @@
+"""
+Общая обработка запросов к объемам для Flask (simple_server) и ASGI (routes/volumes)
+
+Функции не зависят от фреймворка: получают уже разобранные параметры запроса
+и возвращают данные, ответ собирает вызывающий сервер.
+"""
+import os
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from services.render_cache import render_cache
+from services.render_pool import Rendered
+from services.slice_prefetch import slice_prefetcher
+from services.volume_pyramid import MAX_LEVEL, level_shape
+from services.volume_reader import MappedVolume, open_volume
+from services.volume_render import resolve_window
+from services.volume_scout import scout_meta
+from services.volume_stats import get_stats
+from services.volume_store import read_names, resolve_name, store_dir
+
+VOLUME_EXTENSIONS = ('.zip', '.vol', '.bvol')
+
+
+def search_dirs() -> List[str]:
+    """Каталоги с объемами: текущий и родительский"""
+    return [os.getcwd(), os.path.dirname(os.getcwd())]
+
+
+def find_file(filename: str) -> Optional[str]:
+    """Поиск файла: загруженные исследования по имени, затем текущая и родительская директории"""
+    stored = resolve_name(filename)
+    if stored:
+        return stored
+
+    for search_dir in search_dirs():
+        potential_path = os.path.join(search_dir, filename)
+        if os.path.exists(potential_path):
+            return potential_path
+
+    return None
+
+
+def _file_entry(name: str, file_path: str, digest: Optional[str] = None) -> Optional[Dict]:
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return None
+    return {
+        'name': name,
+        'size': file_stat.st_size,
+        'path': file_path,
+        'digest': digest,
+        'scout': scout_meta(file_path) is not None
+    }
+
+
+def list_volume_files() -> List[Dict]:
+    """
+    Загруженные исследования и файлы каталогов поиска: имя, размер, путь,
+    дайджест (для загруженных) и готовность миниатюр
+    """
+    files = []
+    for name, stored_name in sorted(read_names().items()):
+        entry = _file_entry(name, os.path.join(store_dir(), stored_name), os.path.splitext(stored_name)[0])
+        if entry:
+            files.append(entry)
+
+    for search_dir in search_dirs():
+        if not os.path.exists(search_dir):
+            continue
+        for file in os.listdir(search_dir):
+            if file.endswith(VOLUME_EXTENSIONS):
+                entry = _file_entry(file, os.path.join(search_dir, file))
+                if entry:
+                    files.append(entry)
+    return files
+
+
+def volume_info(file_path: str, filename: str) -> Dict:
+    """Размер файла, форма уровней пирамиды, шаг вокселя и формат хранения объема"""
+    file_size = os.path.getsize(file_path)
+    volume = open_volume(file_path) if file_path.endswith(('.vol', '.bvol')) else None
+    shape = volume.shape if volume else None
+    levels = [level_shape(shape, level) for level in range(MAX_LEVEL + 1)] if shape else None
+
+    return {
+        'filename': filename,
+        'file_size': file_size,
+        'file_path': file_path,
+        'shape': shape,
+        'levels': levels,
+        'spacing': volume.spacing if volume else None,
+        'dtype': volume.data.dtype.name if volume else None,
+        'header_size': volume.header_size if isinstance(volume, MappedVolume) else None
+    }
+
+
+def parse_vector(value: str) -> List[float]:
+    """Разбор вектора вида 'x,y,z'"""
+    try:
+        vector = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError(f"Некорректный вектор: {value}")
+    if len(vector) != 3:
+        raise ValueError(f"Вектор должен состоять из трех компонент: {value}")
+    if not np.all(np.isfinite(vector)):
+        raise ValueError(f"Компоненты вектора должны быть конечными числами: {value}")
+    return vector
+
+
+def parse_window(
+    file_path: str,
+    center: Optional[float],
+    width: Optional[float],
+    preset: Optional[str],
+    invert: bool,
+    gamma: float
+) -> Tuple[int, int, bool, float]:
+    """Окно/уровень для рендера; недостающее берется из пресета или статистики объема"""
+    if not (np.isfinite(gamma) and gamma > 0):
+        raise ValueError(f"Гамма должна быть положительным конечным числом: {gamma}")
+    gamma = round(gamma, 2)
+    if gamma <= 0:
+        raise ValueError("Гамма должна быть положительной")
+
+    center, width = resolve_window(get_stats(file_path), center, width, preset)
+    return center, width, invert, gamma
+
+
+def cached_render(key: Hashable, render) -> Rendered:
+    """Срез из кэша; при промахе ждет упреждающий рендер или рендерит сам"""
+    rendered = render_cache.get(key)
+    if rendered is None:
+        rendered = slice_prefetcher.wait(key)
+    if rendered is None:
+        rendered = render()
+        render_cache.put(key, rendered, len(rendered[0]))
+    slice_prefetcher.claim(key)
+    return rendered
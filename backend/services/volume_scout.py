@@ -0,0 +1,208 @@
+"""
+Обзорные миниатюры исследования: средние срезы трех осей и MIP в низком разрешении
+
+Миниатюры строятся один раз при загрузке (или при первом запросе) за один
+проход по аксиальным плоскостям и сохраняются в PNG рядом с файлом
+исследования. Списки файлов показывают превью, не открывая сам объем.
+Для .zip архив распаковывается во временный каталог только на время построения.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from services.slice_codecs import encode_plane
+from services.volume_meta import detect_geometry
+from services.volume_reader import ArrayVolume, MappedVolume, open_volume
+
+logger = logging.getLogger(__name__)
+
+SCOUT_VIEWS = ('axial', 'coronal', 'sagittal', 'mip')
+
+# Наибольшая сторона миниатюры в пикселях
+SCOUT_SIZE = int(os.getenv("SCOUT_SIZE", "256"))
+
+# Сколько аксиальных плоскостей читается за один проход
+SCOUT_CHUNK = 16
+
+# Окно миниатюр по перцентилям их же пикселей (как пресет auto)
+SCOUT_PERCENTILES = (1, 99)
+
+SCOUT_SUFFIX = '.scout'
+
+
+def scout_dir(path: str) -> str:
+    """Каталог с миниатюрами рядом с файлом исследования"""
+    return os.path.realpath(path) + SCOUT_SUFFIX
+
+
+def _view_path(path: str, view: str) -> str:
+    return os.path.join(scout_dir(path), f'{view}.png')
+
+
+def validate_view(view: str) -> str:
+    """Проверяет имя миниатюры"""
+    if view not in SCOUT_VIEWS:
+        raise ValueError(f"Неизвестная миниатюра: {view}. Допустимые значения: {', '.join(SCOUT_VIEWS)}")
+    return view
+
+
+def compute_scouts(volume: ArrayVolume, size: int = SCOUT_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Средние срезы (axial, coronal, sagittal) и аксиальная MIP в uint16.
+
+    Объем читается один раз блоками по SCOUT_CHUNK плоскостей; в плоскости
+    берется каждый step-й воксель, так что большая сторона не превышает size.
+    """
+    data = volume.data
+    depth, height, width = data.shape
+    step = max(-(-max(depth, height, width) // size), 1)
+    mid_z, mid_y, mid_x = depth // 2, height // 2, width // 2
+
+    mip = None
+    coronal, sagittal = [], []
+    for start in range(0, depth, SCOUT_CHUNK):
+        stop = min(start + SCOUT_CHUNK, depth)
+        volume.will_need(stop, stop + SCOUT_CHUNK)
+        block = np.asarray(data[start:stop])
+        projected = block[:, ::step, ::step].max(axis=0)
+        mip = projected if mip is None else np.maximum(mip, projected)
+        coronal.append(block[:, mid_y, ::step])
+        sagittal.append(block[:, ::step, mid_x])
+
+    return {
+        'axial': np.array(data[mid_z, ::step, ::step]),
+        'coronal': np.concatenate(coronal)[::step],
+        'sagittal': np.concatenate(sagittal)[::step],
+        'mip': mip,
+    }
+
+
+def encode_scouts(planes: Dict[str, np.ndarray]) -> Dict[str, bytes]:
+    """PNG миниатюр с общим окном по перцентилям всех плоскостей"""
+    values = np.concatenate([plane.ravel() for plane in planes.values()])
+    low, high = np.percentile(values, SCOUT_PERCENTILES)
+    window = (int(round((low + high) / 2)), max(int(round(high - low)), 1), False, 1.0)
+    return {view: encode_plane(plane, window, 'png')[0] for view, plane in planes.items()}
+
+
+@contextmanager
+def _study_volume(path: str) -> Iterator[ArrayVolume]:
+    """Объем исследования; из .zip - через временную распаковку, без общего кэша"""
+    if not path.lower().endswith('.zip'):
+        yield open_volume(path)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='scout_', ignore_cleanup_errors=True) as temp_dir:
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(temp_dir)
+        vol_files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(temp_dir)
+            for name in names if name.endswith('.vol')
+        )
+        if not vol_files:
+            raise ValueError(f"Файл .vol не найден в архиве {path}")
+
+        # VolumeId.xml и ver_ctrl.txt распакованы рядом, геометрия определяется как обычно
+        vol_path = vol_files[0]
+        geometry = detect_geometry(vol_path)
+        volume = MappedVolume(
+            vol_path,
+            os.stat(vol_path).st_mtime_ns,
+            header_size=geometry['header_size'],
+            slice_shape=geometry['shape'][1:],
+            dtype=geometry['dtype'],
+            spacing=geometry['spacing']
+        )
+        try:
+            yield volume
+        finally:
+            # Открытое отображение не дает удалить распакованный файл на Windows
+            volume.close()
+
+
+def _read_meta(path: str) -> dict:
+    try:
+        with open(os.path.join(scout_dir(path), 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def scout_meta(path: str) -> Optional[Dict]:
+    """Описание готовых миниатюр (форма и шаг вокселя объема) или None, если их нет или они устарели"""
+    meta = _read_meta(path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if meta.get('mtime_ns') != mtime_ns:
+        return None
+    return meta
+
+
+class ScoutBuilder:
+    """Построение миниатюр с блокировкой на файл: параллельные запросы не считают их повторно"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _build_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(path, threading.Lock())
+
+    def build(self, path: str) -> Dict:
+        """Строит и сохраняет миниатюры, если их нет или файл изменился; возвращает описание"""
+        path = os.path.realpath(path)
+        with self._build_lock(path):
+            meta = scout_meta(path)
+            if meta is not None:
+                return meta
+
+            mtime_ns = os.stat(path).st_mtime_ns
+            logger.info(f"Строим миниатюры для {path}")
+            with _study_volume(path) as volume:
+                images = encode_scouts(compute_scouts(volume))
+                meta = {
+                    'mtime_ns': mtime_ns,
+                    'shape': list(volume.shape),
+                    'spacing': list(volume.spacing),
+                    'views': list(images),
+                }
+
+            directory = scout_dir(path)
+            os.makedirs(directory, exist_ok=True)
+            for view, image in images.items():
+                target = _view_path(path, view)
+                temp = f'{target}.{os.getpid()}.tmp'
+                with open(temp, 'wb') as f:
+                    f.write(image)
+                os.replace(temp, target)
+            # meta.json последним: пока его нет, миниатюры считаются неготовыми
+            with open(os.path.join(directory, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            return meta
+
+
+scout_builder = ScoutBuilder()
+
+
+def build_scouts(path: str) -> Dict:
+    """Строит миниатюры исследования заранее (например, при загрузке файла)"""
+    return scout_builder.build(path)
+
+
+def get_scout(path: str, view: str) -> bytes:
+    """PNG миниатюры; при отсутствии строит все миниатюры исследования"""
+    validate_view(view)
+    build_scouts(path)
+    with open(_view_path(path, view), 'rb') as f:
+        return f.read()
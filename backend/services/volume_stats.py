@@ -0,0 +1,141 @@
+"""
+Статистика интенсивностей объема: min/max, перцентили и гистограмма
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict
+
+import numpy as np
+
+from services.volume_reader import open_volume
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BINS = 4096
+PERCENTILES = (0.5, 1, 5, 50, 95, 99, 99.5)
+
+# Сколько аксиальных плоскостей обрабатывается за один проход
+STATS_CHUNK = 16
+
+STATS_SUFFIX = '.stats.json'
+
+
+def compute_stats(data: np.ndarray) -> Dict:
+    """
+    Потоковый расчет статистики uint16 объема блоками по STATS_CHUNK плоскостей.
+
+    Гистограмма из HISTOGRAM_BINS корзин покрывает весь диапазон uint16,
+    перцентили оцениваются по ней с точностью до ширины корзины.
+    """
+    if data.dtype.itemsize != 2 or data.dtype.kind != 'u':
+        raise ValueError(f"Ожидался объем uint16, получен {data.dtype}")
+
+    shift = 16 - int(np.log2(HISTOGRAM_BINS))
+    histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    low, high, total = None, None, 0.0
+
+    for start in range(0, data.shape[0], STATS_CHUNK):
+        block = data[start:start + STATS_CHUNK]
+        block_min, block_max = int(block.min()), int(block.max())
+        low = block_min if low is None else min(low, block_min)
+        high = block_max if high is None else max(high, block_max)
+        total += float(block.sum(dtype=np.uint64))
+        histogram += np.bincount((block >> shift).ravel(), minlength=HISTOGRAM_BINS)
+
+    count = int(histogram.sum())
+    bin_width = 1 << shift
+    cumulative = np.cumsum(histogram)
+    percentiles = {}
+    for percentile in PERCENTILES:
+        index = int(np.searchsorted(cumulative, count * percentile / 100.0))
+        # Середина корзины, ограниченная фактическим диапазоном
+        value = index * bin_width + bin_width // 2
+        percentiles[str(percentile)] = int(min(max(value, low), high))
+
+    return {
+        'min': low,
+        'max': high,
+        'mean': total / count,
+        'count': count,
+        'percentiles': percentiles,
+        'histogram_bin_width': bin_width,
+        'histogram': histogram.tolist(),
+    }
+
+
+def stats_path(path: str) -> str:
+    """Файл статистики рядом с объемом"""
+    return os.path.realpath(path) + STATS_SUFFIX
+
+
+class StatsCache:
+    """Статистика объемов в памяти и в json рядом с файлом, ключ - (путь, mtime)"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def get(self, path: str) -> Dict:
+        """Возвращает статистику объема, при первом обращении считает ее"""
+        volume = open_volume(path)
+        key = (volume.path, volume.mtime_ns)
+
+        stats = self._stats.get(key)
+        if stats is not None:
+            return stats
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(volume.path, threading.Lock())
+
+        with build_lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._load(volume.path, volume.mtime_ns)
+            if stats is None:
+                logger.info(f"Считаем статистику интенсивностей для {volume.path}")
+                stats = compute_stats(volume.data)
+                self._save(volume.path, volume.mtime_ns, stats)
+
+            with self._lock:
+                for stale_key in [k for k in self._stats if k[0] == volume.path]:
+                    del self._stats[stale_key]
+                self._stats[key] = stats
+
+        return stats
+
+    @staticmethod
+    def _load(path: str, mtime_ns: int):
+        try:
+            with open(stats_path(path)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get('mtime_ns') != mtime_ns:
+            return None
+        return stored['stats']
+
+    @staticmethod
+    def _save(path: str, mtime_ns: int, stats: Dict) -> None:
+        target = stats_path(path)
+        temp = f'{target}.{os.getpid()}.tmp'
+        try:
+            with open(temp, 'w') as f:
+                json.dump({'mtime_ns': mtime_ns, 'stats': stats}, f)
+            os.replace(temp, target)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить статистику для {path}: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+stats_cache = StatsCache()
+
+
+def get_stats(path: str) -> Dict:
+    """Статистика интенсивностей объема через общий кэш"""
+    return stats_cache.get(path)
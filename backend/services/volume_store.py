@@ -0,0 +1,137 @@
+"""
+Контентно-адресуемое хранилище загруженных исследований
+
+Загрузка хешируется (SHA-256) по мере записи во временный файл и сохраняется
+один раз как <дайджест><расширение> в каталоге хранилища. Имя файла клиента
+лишь ссылается на дайджест через индекс names.json, поэтому повторная загрузка
+того же исследования (другой клиникой или под другим именем) не создает копию.
+Все кэши (готовые срезы, пирамида, статистика, миниатюры) строятся по реальному
+пути файла, то есть по дайджесту, и переживают переименования.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Каталог хранилища; относительный путь - от текущей директории сервера
+VOLUME_STORE = os.getenv("VOLUME_STORE", "volume_store")
+
+STORE_EXTENSIONS = ('.zip', '.vol', '.bvol')
+NAMES_FILE = 'names.json'
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+_names_lock = threading.Lock()
+
+
+def store_dir() -> str:
+    """Абсолютный путь к каталогу хранилища"""
+    return os.path.abspath(VOLUME_STORE)
+
+
+def _extension(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in STORE_EXTENSIONS:
+        raise ValueError(f"Неподдерживаемый тип файла: {filename}. Допустимые: {', '.join(STORE_EXTENSIONS)}")
+    return extension
+
+
+def validate_digest(digest: str) -> str:
+    """Проверяет дайджест SHA-256 в шестнадцатеричном виде"""
+    if not DIGEST_PATTERN.match(digest):
+        raise ValueError(f"Некорректный дайджест: {digest}")
+    return digest
+
+
+def stored_path(digest: str, filename: str) -> str:
+    """Путь к исследованию с дайджестом digest и расширением файла filename"""
+    return os.path.join(store_dir(), validate_digest(digest) + _extension(filename))
+
+
+def read_names() -> Dict[str, str]:
+    """Индекс имя клиента -> файл в хранилище"""
+    try:
+        with open(os.path.join(store_dir(), NAMES_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _link_name(filename: str, stored_name: str) -> None:
+    with _names_lock:
+        names = read_names()
+        names[filename] = stored_name
+        target = os.path.join(store_dir(), NAMES_FILE)
+        temp = f'{target}.{os.getpid()}.tmp'
+        with open(temp, 'w') as f:
+            json.dump(names, f)
+        os.replace(temp, target)
+
+
+def resolve_name(filename: str) -> Optional[str]:
+    """Путь к исследованию, загруженному под именем filename, или None"""
+    stored_name = read_names().get(filename)
+    if stored_name is None:
+        return None
+    path = os.path.join(store_dir(), stored_name)
+    return path if os.path.exists(path) else None
+
+
+class StoreUpload:
+    """
+    Загрузка в хранилище: вызывающий пишет блоки в temp_path и передает их в update.
+
+    Запись файла остается за вызывающим (синхронно во Flask, через aiofiles в ASGI),
+    здесь считается только дайджест и выполняется фиксация.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = os.path.basename(filename)
+        _extension(self.filename)
+        os.makedirs(store_dir(), exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=store_dir(), suffix='.upload')
+        os.close(fd)
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def update(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> Dict:
+        """Сохраняет файл под дайджестом (если такого еще нет) и связывает с ним имя клиента"""
+        digest = self._hash.hexdigest()
+        path = stored_path(digest, self.filename)
+        duplicate = os.path.exists(path)
+        if duplicate:
+            os.remove(self.temp_path)
+            logger.info(f"{self.filename}: исследование {digest} уже в хранилище")
+        else:
+            os.replace(self.temp_path, path)
+        _link_name(self.filename, os.path.basename(path))
+        return {'name': self.filename, 'digest': digest, 'path': path, 'size': self.size, 'duplicate': duplicate}
+
+    def abort(self) -> None:
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def link_existing(filename: str, digest: str) -> Optional[Dict]:
+    """
+    Связывает имя с уже сохраненным исследованием без передачи данных.
+
+    Клиент, посчитавший дайджест сам, так загружает повторное исследование мгновенно;
+    None - исследования в хранилище нет, нужна обычная загрузка.
+    """
+    filename = os.path.basename(filename)
+    path = stored_path(digest, filename)
+    if not os.path.exists(path):
+        return None
+    _link_name(filename, os.path.basename(path))
+    return {'name': filename, 'digest': digest, 'path': path, 'size': os.path.getsize(path), 'duplicate': True}
@@ -0,0 +1,141 @@
+"""
+Потоковая выдача данных объема бинарными пакетами
+"""
+import json
+import struct
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from services.volume_mpr import plane_count, plane_range
+from services.volume_pyramid import MAX_LEVEL, open_level, validate_level
+from services.volume_reader import ArrayVolume
+
+# Аксиальных плоскостей в одном блоке данных прогрессивной выдачи
+PROGRESSIVE_CHUNK = 16
+
+
+def pack_header(header: Dict, align: int = 1) -> bytes:
+    """
+    JSON заголовок с префиксом длины (uint32 little-endian).
+
+    JSON дополняется пробелами так, чтобы длина пакета была кратна align -
+    данные после заголовка тогда читаются типизированными массивами без копирования.
+    """
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    encoded += b' ' * (-(len(encoded) + 4) % align)
+    return struct.pack('<I', len(encoded)) + encoded
+
+
+def slice_batch(
+    volume: ArrayVolume,
+    axis: str,
+    start: int,
+    stop: int,
+    step: int = 1
+) -> Tuple[int, Iterator[bytes]]:
+    """
+    Пакет срезов одним ответом: [uint32 длина][JSON заголовок][срезы подряд].
+
+    Заголовок содержит индексы срезов, их смещения от начала данных, dtype и форму.
+    Возвращает полный размер ответа и итератор его частей; срезы читаются
+    из memory map по мере отправки, весь пакет в памяти не собирается.
+    """
+    indices = plane_range(plane_count(volume.shape, axis), start, stop, step)
+    depth, height, width = volume.shape
+    shape = {
+        'axial': (height, width),
+        'coronal': (depth, width),
+        'sagittal': (depth, height),
+    }[axis]
+    slice_bytes = shape[0] * shape[1] * volume.data.dtype.itemsize
+
+    header = pack_header({
+        'axis': axis,
+        'dtype': 'uint16',
+        'byteorder': 'little',
+        'shape': shape,
+        'indices': list(indices),
+        'offsets': [i * slice_bytes for i in range(len(indices))],
+        'slice_bytes': slice_bytes,
+    }, align=2)
+
+    def generate():
+        yield header
+        for _, plane in volume.planes(axis, start, stop, step):
+            yield plane.astype('<u2', copy=False).tobytes()
+
+    return len(header) + len(indices) * slice_bytes, generate()
+
+
+def progressive_levels(path: str, finest: int = 0, coarsest: int = MAX_LEVEL) -> Tuple[int, Iterator[bytes]]:
+    """
+    Уровни пирамиды от грубого к точному, каждый отдельным кадром:
+    [uint32 длина][JSON заголовок][объем uint16 (z, y, x)].
+
+    Заголовок кадра содержит уровень, форму, шаг вокселя и размер данных
+    в байтах; признак final отмечает последний кадр. Первым идет самый
+    маленький уровень, поэтому клиент может показать объем сразу и уточнять
+    его по мере прихода следующих кадров. Данные читаются из memory map
+    блоками по PROGRESSIVE_CHUNK плоскостей по мере отправки.
+    """
+    validate_level(finest)
+    validate_level(coarsest)
+    if finest > coarsest:
+        raise ValueError(f"Точный уровень {finest} грубее начального {coarsest}")
+
+    # Открываем все уровни заранее: ошибки и построение пирамиды - до начала ответа
+    volumes = [(level, open_level(path, level)) for level in range(coarsest, finest - 1, -1)]
+    frames = []
+    for level, volume in volumes:
+        depth, height, width = volume.shape
+        data_bytes = depth * height * width * 2
+        header = pack_header({
+            'level': level,
+            'dtype': 'uint16',
+            'byteorder': 'little',
+            'shape': volume.shape,
+            'spacing': volume.spacing,
+            'bytes': data_bytes,
+            'final': level == finest,
+        }, align=2)
+        frames.append((header, volume, data_bytes))
+
+    def generate():
+        for header, volume, _ in frames:
+            yield header
+            depth = volume.shape[0]
+            for start in range(0, depth, PROGRESSIVE_CHUNK):
+                stop = min(start + PROGRESSIVE_CHUNK, depth)
+                volume.will_need(stop, stop + PROGRESSIVE_CHUNK)
+                yield np.asarray(volume.data[start:stop]).astype('<u2', copy=False).tobytes()
+
+    size = sum(len(header) + data_bytes for header, _, data_bytes in frames)
+    return size, generate()
+
+
+def parse_byte_range(value: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Диапазон из заголовка Range как (start, end) включительно.
+
+    None - диапазона нет или он составной (отдается весь файл);
+    ValueError - диапазон лежит за концом файла (ответ 416).
+    """
+    if not value or not value.startswith('bytes=') or ',' in value:
+        return None
+    first, _, last = value[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # bytes=-N: последние N байт
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError(f"Диапазон {value} вне файла размером {size}")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
@@ -0,0 +1,78 @@
+"""
+Тайловая выдача срезов для глубокого масштабирования (deep zoom)
+
+Масштаб z = 0 - самый грубый уровень пирамиды (MAX_LEVEL), z = MAX_LEVEL -
+исходное разрешение. Срез на масштабе z берется из уровня MAX_LEVEL - z и
+режется на тайлы TILE_SIZE x TILE_SIZE; крайние тайлы могут быть меньше.
+Тайл x - столбец, y - строка изображения среза.
+"""
+import os
+from typing import Dict, List, Tuple
+
+from services.volume_mpr import AXES, plane_count, validate_axis
+from services.volume_pyramid import MAX_LEVEL, level_shape
+
+TILE_SIZE = 256
+
+# Время кэширования тайлов браузером и прокси; изменение файла меняет ETag
+TILE_MAX_AGE = int(os.getenv("TILE_MAX_AGE", "3600"))
+
+
+def zoom_level(zoom: int) -> int:
+    """Уровень пирамиды для масштаба zoom"""
+    if not 0 <= zoom <= MAX_LEVEL:
+        raise ValueError(f"Масштаб должен быть от 0 до {MAX_LEVEL}")
+    return MAX_LEVEL - zoom
+
+
+def plane_size(shape: Tuple[int, int, int], axis: str) -> Tuple[int, int]:
+    """(высота, ширина) изображения среза вдоль оси для объема (z, y, x)"""
+    depth, height, width = shape
+    return {
+        'axial': (height, width),
+        'coronal': (depth, width),
+        'sagittal': (depth, height),
+    }[validate_axis(axis)]
+
+
+def level_index(shape: Tuple[int, int, int], axis: str, index: int, level: int) -> int:
+    """
+    Номер среза на уровне пирамиды для среза index исходного объема shape.
+
+    level_shape отбрасывает нечетный остаток (101 -> 50), поэтому последние
+    срезы объема нечетного размера приходятся на последний срез уровня.
+    """
+    count = plane_count(shape, axis)
+    if not 0 <= index < count:
+        raise IndexError(f"Срез {index} вне диапазона 0..{count - 1}")
+    return min(index >> level, plane_count(level_shape(shape, level), axis) - 1)
+
+
+def tile_bounds(shape: Tuple[int, int, int], axis: str, x: int, y: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Строки и столбцы тайла (x, y) на срезе объема shape"""
+    rows, cols = plane_size(shape, axis)
+    if not (0 <= y < -(-rows // TILE_SIZE) and 0 <= x < -(-cols // TILE_SIZE)):
+        raise IndexError(f"Тайл {x}/{y} вне изображения {cols}x{rows}")
+    return (
+        (y * TILE_SIZE, min((y + 1) * TILE_SIZE, rows)),
+        (x * TILE_SIZE, min((x + 1) * TILE_SIZE, cols)),
+    )
+
+
+def tile_layout(shape: Tuple[int, int, int], axis: str) -> Dict:
+    """Масштабы среза: уровень пирамиды, размер изображения, число тайлов и срезов"""
+    zooms: List[Dict] = []
+    for zoom in range(MAX_LEVEL + 1):
+        level = zoom_level(zoom)
+        scaled = level_shape(shape, level)
+        rows, cols = plane_size(scaled, axis)
+        zooms.append({
+            'zoom': zoom,
+            'level': level,
+            'width': cols,
+            'height': rows,
+            'columns': -(-cols // TILE_SIZE),
+            'rows': -(-rows // TILE_SIZE),
+            'slices': scaled[AXES.index(axis)],
+        })
+    return {'axis': axis, 'tile_size': TILE_SIZE, 'zooms': zooms}
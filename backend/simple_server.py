@@ -6,13 +6,24 @@ import sys
 import json
 import logging
 import platform
-import subprocess
-import tempfile
-import zipfile
-from flask import Flask, request, jsonify, send_from_directory
-import numpy as np
-from PIL import Image
-import io
+from flask import Flask, request, jsonify, send_file
+from services.onevolume_launcher import launcher
+from services.render_cache import render_cache
+from services.render_pool import render_oblique, render_pool, render_slice
+from services.slice_prefetch import slice_prefetcher
+from services.slice_codecs import validate_format
+from services.volume_crop import crop_stream, parse_box, resolve_box
+from services.volume_filters import filter_cache, validate_filter
+from services.volume_mesh import default_threshold, get_mesh, mesh_cache, validate_budget
+from services.volume_mpr import plane_count
+from services.volume_pyramid import MAX_LEVEL, open_level
+from services.volume_reader import MappedVolume, open_volume, volume_key
+from services.volume_reslice import validate_plane_size
+from services.volume_requests import (
+    cached_render, find_file, list_volume_files, parse_vector, parse_window, volume_info
+)
+from services.volume_stats import get_stats
+from services.volume_stream import slice_batch
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -20,115 +31,31 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-class OneVolumeViewerLauncher:
-    def __init__(self):
-        self.onevolume_path = self.find_onevolume_viewer()
-        self.current_file = None
-        self.process = None
-        
-    def find_onevolume_viewer(self):
-        """Поиск OneVolumeViewer.exe"""
-        possible_paths = [
-            "OneVolumeViewer.exe",
-            os.path.join(os.path.dirname(__file__), "OneVolumeViewer.exe"),
-            os.path.join(os.path.dirname(os.path.dirname(__file__)), "OneVolumeViewer.exe")
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                logger.info(f"Найден OneVolumeViewer: {os.path.abspath(path)}")
-                return os.path.abspath(path)
-        
-        logger.warning("OneVolumeViewer.exe не найден")
-        return None
-    
-    def extract_archive(self, zip_path):
-        """Извлечение ZIP архива"""
-        try:
-            with tempfile.TemporaryDirectory(prefix="ovv_") as temp_dir:
-                logger.info(f"Извлекаем архив: {zip_path}")
-                
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_dir)
-                
-                # Ищем .vol файл
-                vol_file = None
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        if file.endswith('.vol'):
-                            vol_file = os.path.join(root, file)
-                            logger.info(f"Найден .vol файл: {vol_file}")
-                            break
-                    if vol_file:
-                        break
-                
-                if vol_file:
-                    return vol_file
-                else:
-                    logger.error("Файл .vol не найден в архиве")
-                    return None
-                    
-        except Exception as e:
-            logger.error(f"Ошибка извлечения архива: {e}")
-            return None
-    
-    def launch_onevolume_viewer(self, file_path):
-        """Запуск OneVolumeViewer.exe"""
-        try:
-            if not self.onevolume_path:
-                return False, "OneVolumeViewer.exe не найден"
-            
-            # Останавливаем предыдущий процесс
-            if self.process:
-                self.stop_onevolume_viewer()
-            
-            # Определяем команду в зависимости от платформы
-            if platform.system() == "Windows":
-                if file_path.endswith('.zip'):
-                    # Извлекаем архив
-                    vol_file = self.extract_archive(file_path)
-                    if not vol_file:
-                        return False, "Не удалось извлечь .vol файл из архива"
-                    file_path = vol_file
-                
-                logger.info(f"Запуск команды Windows: {self.onevolume_path} {file_path}")
-                self.process = subprocess.Popen([self.onevolume_path, file_path])
-            else:
-                logger.error("Неподдерживаемая платформа")
-                return False, "Неподдерживаемая платформа"
-            
-            self.current_file = file_path
-            return True, "OneVolumeViewer запущен успешно"
-            
-        except Exception as e:
-            logger.error(f"Ошибка запуска OneVolumeViewer: {e}")
-            return False, f"Ошибка запуска: {str(e)}"
-    
-    def stop_onevolume_viewer(self):
-        """Остановка OneVolumeViewer"""
-        try:
-            if self.process:
-                self.process.terminate()
-                self.process.wait(timeout=5)
-                self.process = None
-                self.current_file = None
-                return True, "OneVolumeViewer остановлен"
-            return True, "OneVolumeViewer не был запущен"
-        except Exception as e:
-            logger.error(f"Ошибка остановки OneVolumeViewer: {e}")
-            return False, f"Ошибка остановки: {str(e)}"
-    
-    def get_status(self):
-        """Получение статуса системы"""
-        return {
-            'onevolume_found': self.onevolume_path is not None,
-            'platform': platform.system(),
-            'status': 'running' if self.process else 'stopped',
-            'current_file': self.current_file
-        }
+def window_from_request(file_path):
+    """Окно/уровень по параметрам запроса wc, ww, preset, invert, gamma"""
+    return parse_window(
+        file_path,
+        request.args.get('wc', type=float),
+        request.args.get('ww', type=float),
+        request.args.get('preset'),
+        request.args.get('invert', 'false').lower() in ('1', 'true'),
+        float(request.args.get('gamma', 1.0))
+    )
+
+def format_from_request():
+    """Формат ответа по параметрам format, quality, compress"""
+    return validate_format(
+        request.args.get('format', 'png'),
+        request.args.get('quality', type=int),
+        request.args.get('compress', type=int)
+    )
 
-# Создаем экземпляр лаунчера
-launcher = OneVolumeViewerLauncher()
+def send_rendered(key, render):
+    """Отдает срез из кэша; при промахе ждет упреждающий рендер или рендерит сам"""
+    data, mimetype, headers = cached_render(key, render)
+    response = app.response_class(data, mimetype=mimetype)
+    response.headers.update(headers)
+    return response
 
 @app.route('/')
 def index():
@@ -235,26 +162,7 @@ def get_status():
 def get_files():
     """Получение списка файлов"""
     try:
-        files = []
-        current_dir = os.getcwd()
-        parent_dir = os.path.dirname(current_dir)
-        
-        for search_dir in [current_dir, parent_dir]:
-            if os.path.exists(search_dir):
-                for file in os.listdir(search_dir):
-                    if file.endswith('.zip') or file.endswith('.vol'):
-                        file_path = os.path.join(search_dir, file)
-                        try:
-                            file_stat = os.stat(file_path)
-                            files.append({
-                                'name': file,
-                                'size': file_stat.st_size,
-                                'path': file_path
-                            })
-                        except:
-                            continue
-        
-        return jsonify({'files': files})
+        return jsonify({'files': list_volume_files()})
     except Exception as e:
         return jsonify({'error': str(e), 'files': []}), 500
 
@@ -269,14 +177,7 @@ def launch_direct():
             return jsonify({'success': False, 'message': 'Имя файла не указано'})
         
         # Ищем файл
-        file_path = None
-        search_dirs = [os.getcwd(), os.path.dirname(os.getcwd())]
-        
-        for search_dir in search_dirs:
-            potential_path = os.path.join(search_dir, filename)
-            if os.path.exists(potential_path):
-                file_path = potential_path
-                break
+        file_path = find_file(filename)
         
         if not file_path:
             return jsonify({'success': False, 'message': f'Файл {filename} не найден'})
@@ -374,25 +275,12 @@ def get_volume_data():
     
     try:
         # Ищем файл
-        file_path = None
-        search_dirs = [os.getcwd(), os.path.dirname(os.getcwd())]
-        
-        for search_dir in search_dirs:
-            potential_path = os.path.join(search_dir, filename)
-            if os.path.exists(potential_path):
-                file_path = potential_path
-                break
+        file_path = find_file(filename)
         
         if not file_path:
             return jsonify({'error': f'Файл не найден: {filename}'}), 404
         
-        file_size = os.path.getsize(file_path)
-        
-        return jsonify({
-            'filename': filename,
-            'file_size': file_size,
-            'file_path': file_path
-        })
+        return jsonify(volume_info(file_path, filename))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -402,45 +290,296 @@ def get_volume_slice():
     """Получение среза объема"""
     filename = request.args.get('file')
     slice_num = int(request.args.get('slice', 0))
+    axis = request.args.get('axis', 'axial')
+    mode = request.args.get('mode')
+    thickness = int(request.args.get('thickness', 1))
+    level = int(request.args.get('level', 0))
+    filter_name = request.args.get('filter')
     
     if not filename:
         return jsonify({'error': 'Файл не указан'}), 400
     
     try:
         # Ищем файл
-        file_path = None
-        search_dirs = [os.getcwd(), os.path.dirname(os.getcwd())]
+        file_path = find_file(filename)
+        
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
+        
+        if filter_name:
+            validate_filter(filter_name)
+        output = format_from_request()
+        window = window_from_request(file_path) if output[0] != 'raw' else None
+        if not mode:
+            thickness = 1
+        view = (axis, level, mode, thickness, window, output, filter_name)
+        
+        def slice_job(index):
+            key = volume_key(file_path) + ('slice', index) + view
+            
+            def render():
+                # При RENDER_WORKERS > 0 рендер идет в пуле процессов поверх общих memory map
+                return render_pool.run(
+                    render_slice, file_path, level, axis, index, mode, thickness, window, output, filter_name
+                )
+            
+            return key, render
+        
+        response = send_rendered(*slice_job(slice_num))
+        
+        # Соседние срезы готовятся в фоне по ходу прокрутки этой сессии
+        session = (request.args.get('session') or request.remote_addr, file_path) + view
+        count = plane_count(open_level(file_path, level).shape, axis)
+        slice_prefetcher.schedule(session, slice_num, count, slice_job)
+        
+        return response
+        
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/volume-slices')
+def get_volume_slices():
+    """Диапазон срезов одним бинарным ответом (uint16, заголовок JSON со смещениями)"""
+    filename = request.args.get('file')
+    axis = request.args.get('axis', 'axial')
+    start = int(request.args.get('start', 0))
+    stop = request.args.get('stop', type=int)
+    step = int(request.args.get('step', 1))
+    level = int(request.args.get('level', 0))
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    
+    try:
+        file_path = find_file(filename)
+        
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
+        
+        volume = open_level(file_path, level)
+        if stop is None:
+            stop = start + 1
+        size, chunks = slice_batch(volume, axis, start, stop, step)
+        
+        response = app.response_class(chunks, mimetype='application/octet-stream')
+        response.headers['Content-Length'] = str(size)
+        return response
+        
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/volume-oblique')
+def get_volume_oblique():
+    """Косой срез объема: плоскость задается точкой и нормалью (x,y,z в вокселях)"""
+    filename = request.args.get('file')
+    level = int(request.args.get('level', 0))
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    
+    try:
+        file_path = find_file(filename)
+        
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
+        
+        volume = open_level(file_path, level)
+        depth, height, width = volume.shape
+        
+        point = parse_vector(request.args.get('point', f'{width / 2},{height / 2},{depth / 2}'))
+        normal = parse_vector(request.args.get('normal', '0,0,1'))
+        spacing = float(request.args.get('spacing', 1.0))
+        size = validate_plane_size(
+            (int(request.args.get('width', width)), int(request.args.get('height', height))), spacing
+        )
+        
+        output = format_from_request()
+        window = window_from_request(file_path) if output[0] != 'raw' else None
+        key = volume_key(file_path) + (
+            'oblique', tuple(point), tuple(normal), size, spacing, level, window, output
+        )
+        
+        def render():
+            return render_pool.run(
+                render_oblique, file_path, level, tuple(point), tuple(normal), size, spacing, window, output
+            )
+        
+        return send_rendered(key, render)
+        
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/volume-raw')
+def get_volume_raw():
+    """
+    Бинарный .vol файл с поддержкой Range и ETag/If-None-Match.
+
+    Файл отдается через wsgi.file_wrapper (sendfile, если сервер его поддерживает)
+    без загрузки в память. Заголовки X-Volume-* позволяют клиенту вычислить
+    диапазон байт нужных срезов: offset = header + slice * slice_bytes.
+    """
+    filename = request.args.get('file')
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    
+    try:
+        file_path = find_file(filename)
         
-        for search_dir in search_dirs:
-            potential_path = os.path.join(search_dir, filename)
-            if os.path.exists(potential_path):
-                file_path = potential_path
-                break
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
+        
+        volume = open_volume(file_path)
+        if not isinstance(volume, MappedVolume):
+            return jsonify({'error': 'Файл хранится в блочном формате, используйте срезы или /api/volume-slices'}), 400
+        size = os.path.getsize(volume.path)
+        
+        response = send_file(
+            volume.path,
+            mimetype='application/octet-stream',
+            conditional=True,
+            etag=f'{volume.mtime_ns:x}-{size:x}',
+            max_age=0
+        )
+        response.headers['X-Volume-Header-Size'] = str(volume.header_size)
+        response.headers['X-Volume-Shape'] = ','.join(str(dim) for dim in volume.shape)
+        response.headers['X-Volume-Dtype'] = volume.data.dtype.name
+        response.headers['X-Volume-Spacing'] = ','.join(str(step) for step in volume.spacing)
+        response.headers['X-Volume-Slice-Bytes'] = str(volume.slice_bytes)
+        return response
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/volume-crop')
+def get_volume_crop():
+    """Область объема x0,y0,z0,x1,y1,z1 (вокселы или мм) как raw uint16 или NIfTI"""
+    filename = request.args.get('file')
+    box = request.args.get('box')
+    units = request.args.get('units', 'voxel')
+    level = int(request.args.get('level', 0))
+    output_format = request.args.get('format', 'raw')
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    if not box:
+        return jsonify({'error': 'Область не указана'}), 400
+    
+    try:
+        file_path = find_file(filename)
         
         if not file_path:
             return jsonify({'error': f'Файл не найден: {filename}'}), 404
         
-        # Читаем срез
-        with open(file_path, 'rb') as f:
-            # Пропускаем заголовок (512 байт)
-            f.seek(512 + slice_num * 512 * 512 * 2)
-            slice_data = f.read(512 * 512 * 2)
+        volume = open_level(file_path, level)
+        region = resolve_box(volume, parse_box(box), units)
+        size, chunks = crop_stream(volume, region, output_format, level)
         
-        # Конвертируем в изображение
-        slice_array = np.frombuffer(slice_data, dtype=np.uint16)
-        slice_array = slice_array.reshape(512, 512)
+        response = app.response_class(chunks, mimetype='application/octet-stream')
+        response.headers['Content-Length'] = str(size)
+        if output_format == 'nifti':
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            response.headers['Content-Disposition'] = f'attachment; filename="{name}_roi.nii"'
+        return response
+        
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/volume-stats')
+def get_volume_stats():
+    """Статистика интенсивностей объема: min/max, перцентили, гистограмма"""
+    filename = request.args.get('file')
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    
+    try:
+        file_path = find_file(filename)
+        
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
         
-        # Нормализуем
-        slice_array = ((slice_array - slice_array.min()) / (slice_array.max() - slice_array.min()) * 255).astype(np.uint8)
+        return jsonify(get_stats(file_path))
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """Счетчики кэша готовых срезов, упреждающего чтения, сеток и отфильтрованных слоев"""
+    stats = render_cache.stats()
+    stats['prefetch'] = slice_prefetcher.stats()
+    stats['mesh'] = mesh_cache.stats()
+    stats['filter'] = filter_cache.stats()
+    return jsonify(stats)
+
+@app.route('/api/volume-level')
+def get_volume_level():
+    """Весь объем уровня пирамиды как little-endian uint16 (превью для 3D)"""
+    filename = request.args.get('file')
+    level = int(request.args.get('level', MAX_LEVEL))
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    
+    try:
+        file_path = find_file(filename)
+        
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
+        
+        if level < 1:
+            return jsonify({'error': 'Уровень 0 слишком велик для выдачи целиком, используйте /api/volume-raw'}), 400
+        
+        volume = open_level(file_path, level)
+        
+        response = app.response_class(volume.data.astype('<u2', copy=False).tobytes(), mimetype='application/octet-stream')
+        response.headers['X-Volume-Shape'] = ','.join(str(size) for size in volume.shape)
+        response.headers['X-Volume-Dtype'] = 'uint16'
+        return response
+        
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/volume-mesh')
+def get_volume_mesh():
+    """Изоповерхность по порогу: квантованные вершины и индексы треугольников (см. services/volume_mesh.py)"""
+    filename = request.args.get('file')
+    threshold = request.args.get('threshold', type=float)
+    level = int(request.args.get('level', 1))
+    
+    if not filename:
+        return jsonify({'error': 'Файл не указан'}), 400
+    
+    try:
+        file_path = find_file(filename)
+        
+        if not file_path:
+            return jsonify({'error': f'Файл не найден: {filename}'}), 404
         
-        # Создаем изображение
-        img = Image.fromarray(slice_array, mode='L')
-        img_io = io.BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
+        budget = validate_budget(request.args.get('triangles', type=int))
+        if threshold is None:
+            threshold = default_threshold(file_path, level)
         
-        return send_from_directory('.', img_io, mimetype='image/png')
+        mesh = get_mesh(file_path, int(round(threshold)), level, budget)
+        return app.response_class(mesh, mimetype='application/octet-stream')
         
+    except (IndexError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
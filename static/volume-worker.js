@@ -25,21 +25,27 @@ self.onmessage = function(e) {
 // Обработка полного объема
 function processVolume(data) {
     try {
-        const { rawData, width, height, depth } = data;
+        const { rawData, width, height, depth, headerSize = 64 } = data;
         
-        // Декодируем base64 данные
-        const binaryString = atob(rawData);
-        const bytes = new Uint8Array(binaryString.length);
-        for (let i = 0; i < binaryString.length; i++) {
-            bytes[i] = binaryString.charCodeAt(i);
+        // ArrayBuffer (например, из /api/volume-raw) используем как есть,
+        // строку base64 декодируем
+        let bytes;
+        if (rawData instanceof ArrayBuffer) {
+            bytes = new Uint8Array(rawData);
+        } else {
+            const binaryString = atob(rawData);
+            bytes = new Uint8Array(binaryString.length);
+            for (let i = 0; i < binaryString.length; i++) {
+                bytes[i] = binaryString.charCodeAt(i);
+            }
         }
         
-        // Пропускаем заголовок (64 байта)
-        const headerSize = 64;
-        const dataBytes = bytes.slice(headerSize);
-        
-        // Конвертируем в 16-bit данные
-        const volumeArray = new Uint16Array(dataBytes.buffer);
+        // Пропускаем заголовок и смотрим на данные как на 16-bit без копирования
+        const volumeArray = new Uint16Array(
+            bytes.buffer,
+            bytes.byteOffset + headerSize,
+            Math.floor((bytes.byteLength - headerSize) / 2)
+        );
         
         // Обрабатываем каждый срез
         const sliceSize = width * height;
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Тесты импортируют модули сервера (services.*) так же, как он сам - от каталога backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
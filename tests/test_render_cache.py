@@ -0,0 +1,39 @@
+from services.render_cache import RenderCache
+
+def test_hits_and_misses():
+    cache = RenderCache(max_bytes=100)
+
+    assert cache.get("a") is None
+    cache.put("a", b"12345", 5)
+
+    assert cache.get("a") == b"12345"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes"] == 5
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", b"aaaa", 4)
+    cache.put("b", b"bbbb", 4)
+    cache.get("a")
+    cache.put("c", b"cccc", 4)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats()["bytes"] == 8
+
+def test_oversized_value_is_not_cached():
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", b"x" * 11, 11)
+
+    assert "a" not in cache
+    assert cache.stats()["entries"] == 0
+
+def test_replacing_key_updates_size():
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", b"aaaa", 4)
+    cache.put("a", b"aa", 2)
+
+    assert cache.stats()["bytes"] == 2
@@ -0,0 +1,27 @@
+import pytest
+
+from services.render_pool import RenderPool, render_oblique, render_slice
+from services.slice_codecs import validate_format
+from test_volume_reader import write_test_volume
+
+def test_process_pool_matches_inline_render(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+    window = (1000, 2000, False, 1.0)
+    output = validate_format("png")
+    pool = RenderPool(workers=1)
+
+    try:
+        assert pool.run(render_slice, path, 0, "coronal", 10, None, 1, window, output) == \
+            render_slice(path, 0, "coronal", 10, None, 1, window, output)
+        assert pool.run(render_oblique, path, 0, (256, 256, 2), (0, 1, 1), (64, 64), 1.0, None, validate_format("raw")) == \
+            render_oblique(path, 0, (256, 256, 2), (0, 1, 1), (64, 64), 1.0, None, validate_format("raw"))
+        with pytest.raises(IndexError):
+            pool.run(render_slice, path, 0, "axial", 99, None, 1, window, output)
+    finally:
+        pool.shutdown()
+
+def test_disabled_pool_runs_inline():
+    pool = RenderPool(workers=0)
+
+    assert pool.run(sum, [1, 2, 3]) == 6
@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from services.slice_codecs import encode_plane, validate_format
+
+WINDOW = (2048, 4096, False, 1.0)
+
+def make_plane():
+    """Срез 64x64 с плавным градиентом"""
+    return (np.arange(64 * 64, dtype=np.uint16).reshape(64, 64) % 4096)
+
+def test_raw_is_little_endian_uint16():
+    plane = make_plane()
+
+    data, mimetype, headers = encode_plane(plane, None, "raw")
+
+    assert mimetype == "application/octet-stream"
+    assert headers["X-Slice-Shape"] == "64,64"
+    assert np.array_equal(np.frombuffer(data, dtype="<u2").reshape(64, 64), plane)
+
+def test_lossless_formats_roundtrip():
+    plane = make_plane()
+    expected = np.rint(np.clip(plane / 4096, 0, 1) * 255).astype(np.uint8)
+
+    for output_format, mimetype in (("png", "image/png"), ("webp", "image/webp")):
+        data, content_type, _ = encode_plane(plane, WINDOW, output_format)
+        assert content_type == mimetype
+        decoded = np.asarray(Image.open(io.BytesIO(data)).convert("L"))
+        assert np.array_equal(decoded, expected)
+
+def test_jpeg_quality_changes_size():
+    plane = make_plane()
+
+    low, mimetype, _ = encode_plane(plane, WINDOW, "jpeg", quality=20)
+    high, _, _ = encode_plane(plane, WINDOW, "jpeg", quality=95)
+
+    assert mimetype == "image/jpeg"
+    assert len(low) < len(high)
+
+def test_validate_format():
+    assert validate_format("png") == ("png", 90, 1)
+    for args in (("gif",), ("jpeg", 0), ("png", None, 10)):
+        try:
+            validate_format(*args)
+            assert False, "Ожидалась ошибка ValueError"
+        except ValueError:
+            pass
@@ -0,0 +1,45 @@
+from services.render_cache import RenderCache
+from services.slice_prefetch import SlicePrefetcher
+
+def make_job(rendered):
+    def job(index):
+        def render():
+            rendered.append(index)
+            return (b"x" * 10, "image/png", {})
+        return ("slice", index), render
+    return job
+
+def test_targets_follow_scroll_direction():
+    prefetcher = SlicePrefetcher(workers=1, depth=4, cache=RenderCache())
+
+    assert prefetcher.targets("s", 50, 100) == [51, 49, 52, 48]
+    assert prefetcher.targets("s", 52, 100) == [54, 56, 58, 60, 51]
+    assert prefetcher.targets("s", 51, 100) == [52, 50, 53, 49]
+    assert prefetcher.targets("s", 50, 100) == [49, 48, 47, 46, 51]
+    assert prefetcher.targets("s", 1, 100) == [2, 0, 3]
+
+def test_prefetched_slices_land_in_cache_and_count_hits():
+    cache = RenderCache()
+    prefetcher = SlicePrefetcher(workers=2, depth=2, cache=cache)
+    rendered = []
+    job = make_job(rendered)
+
+    prefetcher.schedule("s", 10, 100, job)
+    prefetcher.shutdown()
+
+    assert sorted(rendered) == [9, 11]
+    assert ("slice", 11) in cache
+    assert prefetcher.claim(("slice", 11))
+    assert not prefetcher.claim(("slice", 30))
+    # Уже готовые срезы повторно не ставятся в очередь
+    assert prefetcher.schedule("s", 10, 100, job) == 0
+
+    stats = prefetcher.stats()
+    assert stats["completed"] == 2
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_disabled_prefetcher_does_nothing():
+    prefetcher = SlicePrefetcher(workers=0, depth=4, cache=RenderCache())
+
+    assert prefetcher.schedule("s", 10, 100, make_job([])) == 0
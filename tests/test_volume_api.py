@@ -0,0 +1,70 @@
+import pytest
+
+from test_volume_reader import write_test_volume
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Клиент simple_server с тестовым объемом в текущей директории"""
+    import simple_server
+
+    write_test_volume(str(tmp_path / "test.vol"))
+    monkeypatch.chdir(tmp_path)
+    simple_server.render_cache.clear()
+    simple_server.slice_prefetcher.clear()
+    return simple_server.app.test_client()
+
+def test_volume_slice_png(client):
+    response = client.get("/api/volume-slice?file=test.vol&slice=1&axis=coronal")
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+
+def test_neighbour_slices_are_prefetched(client):
+    import simple_server
+
+    client.get("/api/volume-slice?file=test.vol&slice=1&session=a")
+    client.get("/api/volume-slice?file=test.vol&slice=2&session=a")
+    simple_server.slice_prefetcher.shutdown()
+    client.get("/api/volume-slice?file=test.vol&slice=3&session=a")
+
+    prefetch = client.get("/api/cache-stats").get_json()["prefetch"]
+    assert prefetch["hits"] >= 1
+    assert prefetch["requests"] == 3
+
+def test_volume_slice_out_of_range(client):
+    response = client.get("/api/volume-slice?file=test.vol&slice=10")
+
+    assert response.status_code == 400
+
+def test_volume_raw_supports_range_and_etag(client):
+    response = client.get("/api/volume-raw?file=test.vol", headers={"Range": "bytes=512-1023"})
+
+    assert response.status_code == 206
+    assert len(response.data) == 512
+    assert response.headers["X-Volume-Shape"] == "4,512,512"
+
+    etag = response.headers["ETag"]
+    response = client.get("/api/volume-raw?file=test.vol", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_missing_file(client):
+    response = client.get("/api/volume-raw?file=missing.vol")
+
+    assert response.status_code == 404
+
+def test_volume_mesh_is_cached(client):
+    import simple_server
+
+    first = client.get("/api/volume-mesh?file=test.vol&threshold=30000&level=0&triangles=2000")
+    second = client.get("/api/volume-mesh?file=test.vol&threshold=30000&level=0&triangles=2000")
+
+    assert first.status_code == 200
+    assert first.data == second.data
+    assert simple_server.mesh_cache.stats()["hits"] >= 1
+
+def test_volume_crop_nifti(client):
+    response = client.get("/api/volume-crop?file=test.vol&box=10,20,1,110,120,3&format=nifti")
+
+    assert response.status_code == 200
+    assert len(response.data) == 352 + 100 * 100 * 2 * 2
+    assert "test_roi.nii" in response.headers["Content-Disposition"]
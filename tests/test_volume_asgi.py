@@ -0,0 +1,150 @@
+import pytest
+
+from test_volume_reader import write_test_volume
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Клиент FastAPI с роутером объемов и тестовым объемом в текущей директории"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes import volumes
+
+    write_test_volume(str(tmp_path / "test.vol"))
+    monkeypatch.chdir(tmp_path)
+    volumes.render_cache.clear()
+    volumes.slice_prefetcher.clear()
+
+    app = FastAPI()
+    app.include_router(volumes.router, prefix="/api")
+    return TestClient(app)
+
+def test_volume_slice_png(client):
+    response = client.get("/api/volume-slice?file=test.vol&slice=1&axis=coronal")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+@pytest.mark.parametrize("query", ["wc=inf", "ww=nan", "ww=-5", "gamma=nan", "gamma=inf"])
+def test_volume_slice_rejects_bad_window(client, query):
+    response = client.get(f"/api/volume-slice?file=test.vol&slice=1&{query}")
+
+    assert response.status_code == 400
+
+def test_volume_slice_out_of_range(client):
+    response = client.get("/api/volume-slice?file=test.vol&slice=10")
+
+    assert response.status_code == 400
+
+def test_volume_slices_stream(client):
+    response = client.get("/api/volume-slices?file=test.vol&start=0&stop=4&step=2")
+
+    assert response.status_code == 200
+    assert len(response.content) == int(response.headers["Content-Length"])
+
+def test_volume_raw_supports_range_and_etag(client):
+    response = client.get("/api/volume-raw?file=test.vol", headers={"Range": "bytes=512-1023"})
+
+    assert response.status_code == 206
+    assert len(response.content) == 512
+    assert response.headers["Content-Range"] == "bytes 512-1023/2097664"
+    assert response.headers["X-Volume-Shape"] == "4,512,512"
+
+    etag = response.headers["ETag"]
+    response = client.get("/api/volume-raw?file=test.vol", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/api/volume-raw?file=test.vol", headers={"Range": "bytes=99999999-"})
+    assert response.status_code == 416
+
+def test_missing_file(client):
+    response = client.get("/api/volume-stats?file=missing.vol")
+
+    assert response.status_code == 404
+
+def test_files_and_status(client):
+    files = client.get("/api/files").json()["files"]
+
+    assert "test.vol" in [file["name"] for file in files]
+    assert client.get("/api/status").json()["status"] == "stopped"
+
+def test_volume_scout(client):
+    response = client.get("/api/volume-scout?file=test.vol&view=mip")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert client.get("/api/files").json()["files"][0]["scout"] is True
+
+    response = client.get("/api/volume-scout?file=test.vol&view=mip", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+def test_volume_tile_is_cacheable(client):
+    layout = client.get("/api/volume-tiles?file=test.vol").json()
+    assert layout["zooms"][-1]["columns"] == 2
+
+    response = client.get("/api/volume-tile/axial/1/3/1/1?file=test.vol")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+
+    response = client.get("/api/volume-tile/axial/1/3/1/1?file=test.vol", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+def test_upload_is_deduplicated(client):
+    with open("test.vol", "rb") as f:
+        data = f.read()
+
+    first = client.post("/api/upload", files={"file": ("study.vol", data)}).json()
+    second = client.post("/api/upload", files={"file": ("renamed.vol", data)}).json()
+
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert second["digest"] == first["digest"]
+
+    response = client.post("/api/upload-digest", json={"filename": "again.vol", "digest": first["digest"]})
+    assert response.json()["file"] == "again.vol"
+    assert client.get("/api/volume-stats?file=again.vol").status_code == 200
+
+    response = client.post("/api/upload-digest", json={"filename": "again.vol", "digest": "0" * 64})
+    assert response.status_code == 404
+
+def test_volume_progressive(client):
+    response = client.get("/api/volume-progressive?file=test.vol&finest=1")
+
+    assert response.status_code == 200
+    assert len(response.content) == int(response.headers["Content-Length"])
+
+    response = client.get("/api/volume-progressive?file=test.vol&finest=3&coarsest=1")
+    assert response.status_code == 400
+
+def test_volume_oblique_rejects_huge_plane(client):
+    response = client.get("/api/volume-oblique?file=test.vol&width=100000&height=100000")
+
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("query", ["point=nan,0,0", "normal=0,0,inf", "spacing=inf", "spacing=nan"])
+def test_volume_oblique_rejects_non_finite(client, query):
+    response = client.get(f"/api/volume-oblique?file=test.vol&{query}")
+
+    assert response.status_code == 400
+    assert "конечными" in response.json()["detail"]
+
+def test_open_file(client):
+    response = client.post("/api/open/test.vol")
+    assert response.status_code == 200
+    assert response.json()["file"] == "test.vol"
+
+    assert client.get("/api/open/missing.vol").status_code == 404
+
+@pytest.mark.parametrize("query", ["shape=sphere&coords=100,100,2,inf", "shape=rect&coords=0,0,10,10&slope=nan"])
+def test_volume_roi_rejects_non_finite(client, query):
+    response = client.get(f"/api/volume-roi?file=test.vol&{query}")
+
+    assert response.status_code == 400
+    assert "конечными" in response.json()["detail"]
+
+@pytest.mark.parametrize("query", ["points=0,0,0,inf,0,0", "points=0,nan,0,5,5,2", "points=0,0,0,5,5,2&step=nan"])
+def test_volume_profile_rejects_non_finite(client, query):
+    response = client.get(f"/api/volume-profile?file=test.vol&{query}")
+
+    assert response.status_code == 400
+    assert "конечн" in response.json()["detail"]
+
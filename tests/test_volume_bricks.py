@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from services.volume_bricks import CODECS, BrickArray, convert_to_bricks, is_bricked
+from services.volume_reader import BrickedVolume, open_volume
+from services.volume_reslice import oblique_plane
+
+def make_volume():
+    """Объем 70x90x100: воздух (ноль) и неоднородный объект в центре"""
+    rng = np.random.default_rng(2)
+    data = np.zeros((70, 90, 100), dtype=np.uint16)
+    data[20:50, 30:60, 25:80] = rng.integers(500, 3000, (30, 30, 55), dtype=np.uint16)
+    return data
+
+def test_roundtrip_and_random_access(tmp_path):
+    data = make_volume()
+    path = str(tmp_path / "test.bvol")
+
+    summary = convert_to_bricks(data, path, brick_size=32)
+    array = BrickArray(path, "test")
+
+    assert is_bricked(path)
+    assert summary["uniform_bricks"] > 0
+    assert summary["stored_bytes"] < summary["original_bytes"]
+    assert array.shape == data.shape
+    assert np.array_equal(array[:, :, :], data)
+    assert np.array_equal(array[33], data[33])
+    assert np.array_equal(array[:, 45, :], data[:, 45, :])
+    assert np.array_equal(array[5:69:7, 31:89, 99], data[5:69:7, 31:89, 99])
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_codec_roundtrip(tmp_path, codec):
+    if codec.startswith("zstd"):
+        pytest.importorskip("zstandard")
+    data = make_volume()
+    path = str(tmp_path / f"{codec}.bvol")
+    summary = convert_to_bricks(data, path, brick_size=32, codec=codec)
+    array = BrickArray(path, codec)
+
+    assert summary["codec"] == codec
+    assert array.codec == codec
+    assert np.array_equal(array[:, :, :], data)
+
+def test_bricked_volume_is_opened_transparently(tmp_path):
+    data = make_volume()
+    path = str(tmp_path / "test.bvol")
+    convert_to_bricks(data, path, brick_size=32)
+
+    volume = open_volume(path)
+
+    assert isinstance(volume, BrickedVolume)
+    assert np.array_equal(volume.plane("sagittal", 40), data[:, :, 40])
+    assert np.array_equal(volume.slab("axial", 30, 5, "mip"), data[28:33].max(axis=0))
+    assert np.array_equal(
+        oblique_plane(volume.data, (50, 45, 35), (1, 1, 1), (64, 64)),
+        oblique_plane(data, (50, 45, 35), (1, 1, 1), (64, 64))
+    )
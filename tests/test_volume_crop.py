@@ -0,0 +1,55 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from services.volume_crop import crop_stream, nifti_header, parse_box, resolve_box
+from services.volume_reader import ArrayVolume
+
+def make_volume():
+    data = np.arange(20 * 30 * 40, dtype=np.uint16).reshape(20, 30, 40)
+    return data, ArrayVolume(data, (0.5, 0.25, 0.25))
+
+def test_resolve_box_in_voxels_and_mm():
+    _, volume = make_volume()
+
+    assert resolve_box(volume, parse_box("5,6,7,15,16,17")) == (5, 6, 7, 15, 16, 17)
+    # x, y по 0.25 мм, z по 0.5 мм; границы обрезаются по объему
+    assert resolve_box(volume, (1, 1, 1, 2, 2, 100), "mm") == (4, 4, 2, 8, 8, 20)
+    with pytest.raises(ValueError):
+        resolve_box(volume, (50, 0, 0, 60, 5, 5))
+
+@pytest.mark.parametrize("value", ["0,0,0,inf,5,5", "nan,0,0,5,5,5", "0,0,-inf,5,5,5"])
+def test_parse_box_rejects_non_finite(value):
+    with pytest.raises(ValueError, match="конечными"):
+        parse_box(value)
+
+def test_raw_crop_matches_region():
+    data, volume = make_volume()
+
+    size, chunks = crop_stream(volume, (5, 6, 7, 15, 16, 17))
+    payload = b"".join(chunks)
+    (length,) = struct.unpack_from("<I", payload)
+    header = json.loads(payload[4:4 + length])
+    region = np.frombuffer(payload[4 + length:], dtype="<u2").reshape(header["shape"])
+
+    assert len(payload) == size
+    assert header["origin_voxel"] == [5, 6, 7]
+    assert header["origin_mm"] == [1.25, 1.5, 3.5]
+    assert np.array_equal(region, data[7:17, 6:16, 5:15])
+
+def test_nifti_crop_layout():
+    data, volume = make_volume()
+
+    size, chunks = crop_stream(volume, (0, 0, 0, 40, 30, 20), "nifti")
+    payload = b"".join(chunks)
+
+    assert len(payload) == size
+    assert struct.unpack_from("<i", payload, 0)[0] == 348
+    assert struct.unpack_from("<4h", payload, 40) == (3, 40, 30, 20)
+    assert struct.unpack_from("<h", payload, 70)[0] == 512
+    assert struct.unpack_from("<3f", payload, 80) == (0.25, 0.25, 0.5)
+    assert payload[344:348] == b"n+1\0"
+    assert len(nifti_header((1, 1, 1), (1, 1, 1), (0, 0, 0))) == 352
+    assert np.array_equal(np.frombuffer(payload[352:], dtype="<u2").reshape(20, 30, 40), data)
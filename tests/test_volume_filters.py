@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from services.render_cache import RenderCache
+from services.volume_filters import FILTERS, FilteredVolume, filter_block, median
+from services.volume_reader import ArrayVolume
+
+def make_volume():
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 4000, size=(20, 12, 10), dtype=np.uint16)
+    return ArrayVolume(data), data
+
+def full_filter(data, name):
+    """Фильтр всего объема сразу - эталон для послойной фильтрации"""
+    return filter_block(data, name, 0, 0, data.shape[0])
+
+@pytest.mark.parametrize("name", sorted(FILTERS))
+@pytest.mark.parametrize("axis, array_axis", [("axial", 0), ("coronal", 1), ("sagittal", 2)])
+def test_planes_match_whole_volume_filter(name, axis, array_axis):
+    volume, data = make_volume()
+    expected = full_filter(data, name)
+    filtered = FilteredVolume(volume, name, ("test",), RenderCache())
+
+    for index in range(data.shape[array_axis]):
+        assert np.array_equal(filtered.plane(axis, index), np.take(expected, index, axis=array_axis))
+
+def test_slab_spans_chunks():
+    volume, data = make_volume()
+    expected = full_filter(data, "gaussian")
+    filtered = FilteredVolume(volume, "gaussian", ("test",), RenderCache())
+
+    assert np.array_equal(filtered.slab("axial", 16, 5, "mip"), expected[14:19].max(axis=0))
+
+def test_median_removes_impulse():
+    block = np.full((5, 5, 5), 100, dtype=np.uint16)
+    block[2, 2, 2] = 60000
+
+    assert median(block)[1, 1, 1] == 100
+
+def test_chunks_are_cached():
+    volume, _ = make_volume()
+    cache = RenderCache()
+    filtered = FilteredVolume(volume, "median", ("test",), cache)
+
+    filtered.plane("axial", 3)
+    filtered.plane("axial", 4)
+
+    assert cache.stats()["hits"] == 1
+
+def test_unknown_filter():
+    volume, _ = make_volume()
+
+    with pytest.raises(ValueError):
+        FilteredVolume(volume, "blur", ("test",))
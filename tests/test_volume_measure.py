@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from services.volume_measure import measure_region, parse_coords, polygon_mask, region_values
+from services.volume_reader import ArrayVolume
+
+def make_volume():
+    data = np.arange(8 * 16 * 16, dtype=np.uint16).reshape(8, 16, 16)
+    return ArrayVolume(data, (2.0, 0.5, 0.5)), data
+
+def test_rect_on_each_axis():
+    volume, data = make_volume()
+
+    assert np.array_equal(region_values(volume, "rect", [2, 3, 5, 4], "axial", 1), data[1, 3:5, 2:6].ravel())
+    assert np.array_equal(region_values(volume, "rect", [2, 3, 5, 4], "coronal", 7), data[3:5, 7, 2:6].ravel())
+    assert np.array_equal(region_values(volume, "rect", [2, 3, 5, 4], "sagittal", 7), data[3:5, 2:6, 7].ravel())
+
+def test_ellipse_matches_brute_force():
+    volume, data = make_volume()
+
+    values = region_values(volume, "ellipse", [8, 7, 4, 2.5], "axial", 2)
+
+    v, u = np.mgrid[0:16, 0:16]
+    mask = ((u - 8) / 4) ** 2 + ((v - 7) / 2.5) ** 2 <= 1
+    assert np.array_equal(np.sort(values), np.sort(data[2][mask]))
+
+def test_polygon_mask_triangle():
+    v, u = np.ogrid[0:5, 0:5]
+
+    mask = polygon_mask(u, v, [(0, 0), (4.5, 0), (0, 4.5)])
+
+    assert mask.sum() == 15
+    assert not mask[4, 4]
+
+def test_sphere_statistics():
+    volume, data = make_volume()
+
+    result = measure_region(volume, "sphere", [8, 8, 4, 3], bins=8, slope=2.0, intercept=-100.0)
+
+    z, y, x = np.mgrid[0:8, 0:16, 0:16]
+    expected = data[(x - 8) ** 2 + (y - 8) ** 2 + (z - 4) ** 2 <= 9].astype(np.float64) * 2 - 100
+    assert result["count"] == expected.size
+    assert result["mean"] == pytest.approx(expected.mean())
+    assert result["std"] == pytest.approx(expected.std())
+    assert result["min"] == expected.min()
+    assert sum(result["histogram"]) == expected.size
+    assert result["volume_mm3"] == pytest.approx(expected.size * 0.5)
+
+def test_region_outside_volume():
+    volume, _ = make_volume()
+
+    with pytest.raises(ValueError):
+        measure_region(volume, "rect", [100, 100, 120, 120], "axial", 0)
+
+@pytest.mark.parametrize("value", ["10,10,2,inf", "nan,10,2,3", "0,0,-inf,5"])
+def test_parse_coords_rejects_non_finite(value):
+    with pytest.raises(ValueError, match="конечными"):
+        parse_coords(value)
+
@@ -0,0 +1,97 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from services import volume_mesh
+from services.volume_mesh import build_mesh, decimate, default_threshold, get_mesh, pack_mesh, surface_nets
+from services.volume_pyramid import open_level
+from services.volume_reader import VOL_HEADER_SIZE
+
+def make_sphere(radius=10):
+    """Объем 40x50x60 со сферой: значение 1000 ровно на радиусе radius"""
+    z, y, x = np.mgrid[:40, :50, :60]
+    distance = np.sqrt((z - 20) ** 2 + (y - 25) ** 2 + (x - 30) ** 2)
+    return (1000 + (radius - distance) * 100).clip(0).astype(np.uint16)
+
+@pytest.fixture(params=["marching_cubes", "surface_nets"])
+def mesh_backend(request, monkeypatch):
+    """build_mesh со scikit-image и со встроенным surface nets"""
+    if request.param == "marching_cubes":
+        pytest.importorskip("skimage")
+    else:
+        monkeypatch.setattr(volume_mesh, "marching_cubes", None)
+    return request.param
+
+def signed_volume(vertices, triangles):
+    a, b, c = (vertices[triangles[:, k]] for k in range(3))
+    return np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6
+
+def test_surface_nets_sphere_is_closed_and_accurate():
+    vertices, triangles = surface_nets(make_sphere(), 1000)
+
+    distance = np.linalg.norm(vertices - [20, 25, 30], axis=1)
+    edges = np.sort(np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+    _, uses = np.unique(edges, axis=0, return_counts=True)
+
+    assert np.abs(distance - 10).max() < 0.1
+    # Замкнутая поверхность: каждое ребро принадлежит ровно двум треугольникам
+    assert np.all(uses == 2)
+
+def test_build_mesh_outward_normals_in_millimetres(mesh_backend):
+    vertices, triangles = build_mesh(make_sphere(), 1000, (0.5, 0.5, 0.5))
+
+    centered = vertices - vertices.mean(axis=0)
+    assert abs(signed_volume(centered, triangles) - 4 / 3 * np.pi * 5 ** 3) < 20
+    assert np.allclose(vertices.mean(axis=0), [15, 12.5, 10], atol=0.05)
+
+def test_decimate_respects_budget():
+    vertices, triangles = surface_nets(make_sphere(), 1000)
+
+    reduced_vertices, reduced = decimate(vertices, triangles, 500)
+
+    assert 0 < len(reduced) <= 500
+    assert reduced.max() < len(reduced_vertices)
+    assert signed_volume(reduced_vertices - reduced_vertices.mean(axis=0), reduced) < 0
+
+def test_pack_mesh_layout(mesh_backend):
+    vertices, triangles = build_mesh(make_sphere(), 1000, (1, 1, 1), budget=1000)
+
+    packed = pack_mesh(vertices, triangles, {"threshold": 1000})
+    (length,) = struct.unpack_from("<I", packed)
+    header = json.loads(packed[4:4 + length])
+    data = packed[4 + length:]
+    positions = np.frombuffer(data, dtype="<u2", count=header["vertex_count"] * 3).reshape(-1, 3)
+    indices = np.frombuffer(data, dtype=header["index_dtype"], offset=header["indices_offset"])
+
+    assert (4 + length) % 4 == 0
+    assert header["threshold"] == 1000
+    assert len(indices) == header["triangle_count"] * 3
+    low, high = np.array(header["bounds"])
+    restored = low + positions / 65535 * (high - low)
+    assert np.abs(restored - vertices).max() < 1e-3
+
+def test_default_threshold_fits_pyramid_level(tmp_path, mesh_backend):
+    # Градиент и каждый четвертый яркий столбец: 99-й перцентиль исходного объема - 4000,
+    # а после усреднения 2x2x2 максимум уровня 1 - около 3000
+    data = np.broadcast_to(np.arange(512, dtype="<u2") * 4, (8, 512, 512)).copy()
+    data[:, :, ::4] = 4000
+    path = str(tmp_path / "bright.vol")
+    with open(path, "wb") as f:
+        f.write(b"\0" * VOL_HEADER_SIZE)
+        f.write(data.tobytes())
+
+    level = open_level(path, 1).data
+    threshold = default_threshold(path, 1)
+
+    assert default_threshold(path, 0) == 4000
+    assert level.min() <= threshold <= level.max()
+    assert get_mesh(path, threshold, 1, 1000)
+
+def test_threshold_without_surface_gives_empty_mesh(mesh_backend):
+    volume = make_sphere()
+    vertices, triangles = build_mesh(volume, int(volume.max()), (1, 1, 1))
+
+    assert len(vertices) == 0 and len(triangles) == 0
+
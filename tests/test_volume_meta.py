@@ -0,0 +1,80 @@
+import numpy as np
+
+from services.volume_meta import detect_geometry, parse_ver_ctrl
+from services.volume_reader import open_volume
+from services.volume_reslice import oblique_plane
+
+VOLUME_ID = """<?xml version="1.0" encoding="utf-8"?>
+<VolumeId>
+  <V0 strGuid="test-guid">
+    <dmmVolumeRadius value="{radius}"/>
+    <dmmVoxelSize value="{voxel}"/>
+    <dmmVolumeCenter X="1.5" Y="2" Z="-3"/>
+    <strReconstructionFilterSetName value="Standard"/>
+  </V0>
+</VolumeId>
+"""
+
+VER_CTRL = 'Ver="3.0"\nPatientID="42"\nComment="kV:90 mA:8 SliceInterval:0.2mm PixelSpacing:0.2\\0.2"\n'
+
+def write_archive(root, side, header_size, radius=None, voxel=None):
+    """Раскладка архива OneVolumeViewer: ver_ctrl.txt в корне, объем и VolumeId.xml в CT_*"""
+    ct_dir = root / "CT_20250718102232"
+    ct_dir.mkdir(parents=True)
+    data = np.random.default_rng(3).integers(0, 4000, (side, side, side), dtype=np.uint16)
+    path = ct_dir / "CT_0.vol"
+    with open(path, "wb") as f:
+        f.write(b"\1" * header_size)
+        f.write(data.astype("<u2").tobytes())
+    (root / "ver_ctrl.txt").write_text(VER_CTRL)
+    if radius is not None:
+        (ct_dir / "VolumeId.xml").write_text(VOLUME_ID.format(radius=radius, voxel=voxel))
+    return str(path), data
+
+def test_geometry_from_volume_id(tmp_path):
+    path, data = write_archive(tmp_path, 40, 1024, radius=2.0, voxel=0.1)
+
+    geometry = detect_geometry(path)
+    volume = open_volume(path)
+
+    assert geometry["source"] == "volume_id"
+    assert geometry["header_size"] == 1024
+    assert geometry["volume_id"]["center"] == [1.5, 2.0, -3.0]
+    assert volume.shape == (40, 40, 40)
+    assert volume.spacing == (0.1, 0.1, 0.1)
+    assert np.array_equal(volume.plane("coronal", 17), data[:, 17, :])
+    assert np.array_equal(
+        oblique_plane(volume.data, (20, 20, 20), (1, 2, 3), (32, 32)),
+        oblique_plane(data, (20, 20, 20), (1, 2, 3), (32, 32))
+    )
+
+def test_geometry_from_file_size_and_ver_ctrl(tmp_path):
+    path, data = write_archive(tmp_path, 48, 512)
+
+    geometry = detect_geometry(path)
+
+    assert geometry["source"] == "file_size"
+    assert geometry["shape"] == (48, 48, 48)
+    assert geometry["header_size"] == 512
+    assert geometry["spacing"] == (0.2, 0.2, 0.2)
+    assert np.array_equal(open_volume(path).axial(47), data[47])
+
+def test_legacy_layout_is_default(tmp_path):
+    path = str(tmp_path / "legacy.vol")
+    with open(path, "wb") as f:
+        f.write(b"\0" * (512 + 8 * 512 * 512 * 2))
+
+    geometry = detect_geometry(path)
+
+    assert geometry["source"] == "default"
+    assert geometry["shape"] == (8, 512, 512)
+    assert geometry["header_size"] == 512
+
+def test_parse_ver_ctrl(tmp_path):
+    path = tmp_path / "ver_ctrl.txt"
+    path.write_text(VER_CTRL)
+
+    fields = parse_ver_ctrl(str(path))
+
+    assert fields["PatientID"] == "42"
+    assert fields["technical"] == {"kv": 90.0, "ma": 8.0, "slice_interval": 0.2, "pixel_spacing": 0.2}
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from services.volume_profile import parse_polyline, profile_coordinates, sample_profile
+from services.volume_reader import ArrayVolume
+
+def test_profile_follows_polyline_with_fixed_step():
+    vertices = parse_polyline("0,0,0,4,0,0,4,3,0")
+
+    distances, coords = profile_coordinates(vertices, (1.0, 1.0, 1.0), 1.0)
+
+    assert distances.tolist() == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert coords[2].tolist() == [0, 1, 2, 3, 4, 4, 4, 4]
+    assert coords[1].tolist() == [0, 0, 0, 0, 0, 1, 2, 3]
+
+def test_profile_step_is_in_mm():
+    vertices = parse_polyline("0,0,0,0,0,3")
+
+    distances, coords = profile_coordinates(vertices, (0.5, 1.0, 1.0), 0.5)
+
+    assert distances[-1] == pytest.approx(1.5)
+    assert coords[0].tolist() == pytest.approx([0, 1, 2, 3])
+
+def test_sample_profile_interpolates_linear_ramp():
+    data = np.tile(np.arange(16, dtype=np.uint16) * 10, (4, 16, 1))
+    volume = ArrayVolume(data)
+
+    result = sample_profile(volume, parse_polyline("1.5,2,1,20,2,1"), step=0.5)
+
+    assert result["values"][0] == pytest.approx(15.0)
+    assert result["values"][1] == pytest.approx(20.0)
+    # За границей объема (x > 15) значения отсутствуют
+    assert result["values"][-1] is None
+    assert result["count"] == len(result["distances"])
+
+def test_short_polyline_is_rejected():
+    with pytest.raises(ValueError):
+        parse_polyline("1,2,3")
+
+@pytest.mark.parametrize("value", ["0,0,0,inf,0,0", "0,nan,0,5,5,5"])
+def test_parse_polyline_rejects_non_finite(value):
+    with pytest.raises(ValueError, match="конечными"):
+        parse_polyline(value)
+
+@pytest.mark.parametrize("step", [float("nan"), float("inf"), 0])
+def test_profile_step_must_be_positive_and_finite(step):
+    with pytest.raises(ValueError, match="положительным конечным"):
+        profile_coordinates(parse_polyline("0,0,0,5,0,0"), (1, 1, 1), step)
+
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+
+from services.volume_pyramid import PyramidCache, downsample, level_shape, pyramid_dir
+from test_volume_reader import write_test_volume
+
+def test_level_shape():
+    assert level_shape((512, 512, 512), 3) == (64, 64, 64)
+    assert level_shape((4, 512, 512), 3) == (1, 64, 64)
+
+def test_downsample_averages_blocks():
+    data = np.arange(4 * 4 * 4, dtype=np.uint16).reshape(4, 4, 4)
+    out = np.empty((2, 2, 2), dtype=np.uint16)
+
+    downsample(data, out)
+
+    expected = data.reshape(2, 2, 2, 2, 2, 2).mean(axis=(1, 3, 5))
+    assert np.array_equal(out, np.floor(expected + 0.5).astype(np.uint16))
+
+def test_levels_are_built_and_persisted(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    level = PyramidCache().get(path, 2)
+
+    assert level.shape == (1, 128, 128)
+    assert level.data[0, 0, 0] == int(data[0:4, 0:4, 0:4].mean() + 0.5)
+    assert os.path.exists(os.path.join(pyramid_dir(path), "level1.npy"))
+    assert os.path.exists(os.path.join(pyramid_dir(path), "level2.npy"))
+
+    # Новый кэш читает сохраненные уровни с диска
+    reopened = PyramidCache().get(path, 2)
+    assert np.array_equal(reopened.data, level.data)
+
+def test_level_zero_is_source_volume(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    level = PyramidCache().get(path, 0)
+
+    assert np.array_equal(level.axial(3), data[3])
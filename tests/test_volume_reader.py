@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pytest
+
+from services.volume_reader import VOL_HEADER_SIZE, VolumeCache, open_volume
+
+def write_test_volume(path, depth=4):
+    """Создает тестовый .vol файл: заголовок 512 байт и срезы 512x512 uint16"""
+    data = np.arange(depth * 512 * 512, dtype='<u2').reshape(depth, 512, 512)
+    with open(path, "wb") as f:
+        f.write(b"\0" * VOL_HEADER_SIZE)
+        f.write(data.tobytes())
+    return data
+
+def test_axial_slice_matches_file(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    volume = open_volume(path)
+
+    assert volume.shape == (4, 512, 512)
+    assert np.array_equal(volume.axial(2), data[2])
+
+def test_axial_slice_out_of_range(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    volume = open_volume(path)
+
+    with pytest.raises(IndexError, match="вне диапазона"):
+        volume.axial(4)
+
+def test_cache_reuses_mapping(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+    cache = VolumeCache(max_volumes=2)
+
+    assert cache.get(path) is cache.get(path)
+    assert len(cache) == 1
+
+def test_cache_remaps_after_rewrite(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+    cache = VolumeCache(max_volumes=2)
+    first = cache.get(path)
+
+    data = write_test_volume(path, depth=2)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = cache.get(path)
+
+    assert second is not first
+    assert second.shape == (2, 512, 512)
+    assert np.array_equal(second.axial(1), data[1])
+    assert len(cache) == 1
+
+def test_cache_is_bounded(tmp_path):
+    cache = VolumeCache(max_volumes=2)
+    for i in range(3):
+        path = str(tmp_path / f"test{i}.vol")
+        write_test_volume(path, depth=1)
+        cache.get(path)
+
+    assert len(cache) == 2
+
+def test_orthogonal_planes(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    volume = open_volume(path)
+
+    assert np.array_equal(volume.plane("axial", 1), data[1])
+    assert np.array_equal(volume.plane("coronal", 10), data[:, 10, :])
+    assert np.array_equal(volume.plane("sagittal", 511), data[:, :, 511])
+
+def test_unknown_axis(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    volume = open_volume(path)
+
+    with pytest.raises(ValueError, match="Неизвестная ось"):
+        volume.plane("oblique", 0)
+
+def test_slab_projections(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    volume = open_volume(path)
+
+    assert np.array_equal(volume.slab("axial", 1, 3, "mip"), data[0:3].max(axis=0))
+    assert np.array_equal(volume.slab("coronal", 100, 5, "minip"), data[:, 98:103, :].min(axis=1))
+    assert np.array_equal(
+        volume.slab("sagittal", 511, 4, "avg"),
+        np.rint(data[:, :, 509:512].mean(axis=2)).astype(np.uint16)
+    )
+
+def test_slab_unknown_mode(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    volume = open_volume(path)
+
+    with pytest.raises(ValueError, match="Неизвестный режим проекции"):
+        volume.slab("axial", 0, 3, "sum")
+
+def test_planes_iterates_range(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    volume = open_volume(path)
+
+    axial = list(volume.planes("axial", 1, 4, 2))
+    assert [index for index, _ in axial] == [1, 3]
+    assert np.array_equal(axial[1][1], data[3])
+
+    sagittal = list(volume.planes("sagittal", 0, 40, 3))
+    assert [index for index, _ in sagittal] == list(range(0, 40, 3))
+    for index, plane in sagittal:
+        assert np.array_equal(plane, data[:, :, index])
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from services.volume_render import apply_window, resolve_window, window_lut
+
+STATS = {
+    "min": 0,
+    "max": 4000,
+    "percentiles": {"0.5": 10, "1": 20, "5": 100, "50": 1000, "95": 3000, "99": 3800, "99.5": 3900},
+}
+
+def test_window_lut_maps_range():
+    lut = window_lut(1000, 1000)
+
+    assert lut.shape == (65536,)
+    assert lut[0] == 0 and lut[500] == 0
+    assert lut[1000] == 128
+    assert lut[1500] == 255 and lut[65535] == 255
+
+def test_window_lut_is_cached_and_read_only():
+    lut = window_lut(200, 100, True, 1.5)
+
+    assert lut is window_lut(200, 100, True, 1.5)
+    assert not lut.flags.writeable
+    assert lut[0] == 255 and lut[300] == 0
+
+def test_resolve_window_presets():
+    assert resolve_window(STATS) == (2000, 4000)
+    assert resolve_window(STATS, preset="auto") == (1910, 3780)
+    assert resolve_window(STATS, 500.4, 99.6, preset="bone") == (500, 100)
+
+def test_resolve_window_unknown_preset():
+    with pytest.raises(ValueError, match="Неизвестный пресет"):
+        resolve_window(STATS, preset="lung")
+
+@pytest.mark.parametrize("center, width", [(float("inf"), 100), (float("nan"), 100), (100, float("inf")), (100, 0)])
+def test_resolve_window_rejects_invalid_values(center, width):
+    with pytest.raises(ValueError, match="конечным"):
+        resolve_window(STATS, center, width)
+
+def test_apply_window():
+    plane = np.array([[0, 1000], [2000, 65535]], dtype=np.uint16)
+
+    image = apply_window(plane, window_lut(1000, 2000))
+
+    assert image.dtype == np.uint8
+    assert image.tolist() == [[0, 128], [255, 255]]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from services.volume_reslice import MAX_PLANE_EDGE, oblique_plane, plane_basis, plane_coordinates, sample_trilinear
+
+def make_volume():
+    """Объем 16x16x16 с линейно растущими значениями по x, y и z"""
+    z, y, x = np.mgrid[0:16, 0:16, 0:16]
+    return (x + 20 * y + 400 * z).astype(np.uint16)
+
+def test_axial_plane_matches_slice():
+    data = make_volume()
+
+    plane = oblique_plane(data, (7.5, 7.5, 5), (0, 0, 1), (16, 16))
+
+    assert plane.dtype == np.uint16
+    assert np.array_equal(plane, data[5])
+
+def test_trilinear_is_exact_for_linear_field():
+    data = make_volume()
+    coords = np.array([[2.25, 10.5], [3.5, 0.75], [4.125, 14.0]], dtype=np.float32)
+
+    values = sample_trilinear(data, coords)
+
+    expected = coords[2] + 20 * coords[1] + 400 * coords[0]
+    assert np.allclose(values, expected, atol=1e-2)
+
+def test_outside_samples_are_filled():
+    data = make_volume()
+    coords = np.array([[-1.0], [0.0], [0.0]], dtype=np.float32)
+
+    assert sample_trilinear(data, coords, fill=7)[0] == 7
+
+def test_plane_basis_is_orthonormal():
+    u, v, n = plane_basis((1, 2, 3))
+
+    basis = np.stack([u, v, n])
+    assert np.allclose(basis @ basis.T, np.eye(3))
+    assert abs(u[2]) < 1e-9
+
+def test_plane_size_is_bounded():
+    with pytest.raises(ValueError, match="больше допустимого"):
+        plane_coordinates((0, 0, 0), (0, 0, 1), (MAX_PLANE_EDGE + 1, 16))
+    with pytest.raises(ValueError, match="положительными"):
+        plane_coordinates((0, 0, 0), (0, 0, 1), (16, 16), spacing=0)
+    with pytest.raises(ValueError, match="конечными"):
+        plane_coordinates((0, 0, 0), (0, 0, 1), (16, 16), spacing=float("inf"))
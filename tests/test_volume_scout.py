@@ -0,0 +1,56 @@
+import os
+import zipfile
+
+import numpy as np
+
+from services.volume_reader import open_volume
+from services.volume_scout import _study_volume, build_scouts, compute_scouts, get_scout, scout_dir, scout_meta
+from test_volume_reader import write_test_volume
+
+def test_compute_scouts_mid_planes_and_mip(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    scouts = compute_scouts(open_volume(path), size=128)
+
+    assert scouts["axial"].shape == (128, 128)
+    assert np.array_equal(scouts["axial"], data[2, ::4, ::4])
+    assert np.array_equal(scouts["coronal"], data[::4, 256, ::4])
+    assert np.array_equal(scouts["sagittal"], data[::4, ::4, 256])
+    assert np.array_equal(scouts["mip"], data[:, ::4, ::4].max(axis=0))
+
+def test_scouts_are_persisted(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    meta = build_scouts(path)
+
+    assert meta["shape"] == [4, 512, 512]
+    assert os.path.exists(os.path.join(scout_dir(path), "mip.png"))
+    assert scout_meta(path) == meta
+    assert get_scout(path, "coronal").startswith(b"\x89PNG")
+
+def test_scouts_from_zip_study(tmp_path):
+    vol_path = str(tmp_path / "CT_0.vol")
+    write_test_volume(vol_path)
+    zip_path = str(tmp_path / "study.zip")
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.write(vol_path, "CT_20240101/CT_0.vol")
+
+    meta = build_scouts(zip_path)
+
+    assert meta["shape"] == [4, 512, 512]
+    assert get_scout(zip_path, "axial").startswith(b"\x89PNG")
+
+def test_zip_study_mapping_is_closed(tmp_path):
+    write_test_volume(str(tmp_path / "test.vol"))
+    zip_path = str(tmp_path / "study.zip")
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.write(str(tmp_path / "test.vol"), "CT/test.vol")
+
+    with _study_volume(zip_path) as volume:
+        mapping = volume._mmap
+        temp_dir = os.path.dirname(os.path.dirname(volume.path))
+
+    assert mapping.closed
+    assert not os.path.exists(temp_dir)
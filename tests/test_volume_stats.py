@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+
+from services.volume_stats import HISTOGRAM_BINS, StatsCache, compute_stats, stats_path
+from test_volume_reader import write_test_volume
+
+def test_compute_stats_matches_numpy():
+    rng = np.random.default_rng(1)
+    data = rng.integers(100, 3000, (40, 32, 32), dtype=np.uint16)
+
+    stats = compute_stats(data)
+
+    assert stats["min"] == data.min()
+    assert stats["max"] == data.max()
+    assert abs(stats["mean"] - data.mean()) < 1e-6
+    assert len(stats["histogram"]) == HISTOGRAM_BINS
+    assert sum(stats["histogram"]) == data.size
+    for percentile, value in stats["percentiles"].items():
+        exact = np.percentile(data, float(percentile))
+        assert abs(value - exact) <= stats["histogram_bin_width"]
+
+def test_stats_are_cached_next_to_volume(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path, depth=2)
+
+    stats = StatsCache().get(path)
+
+    assert stats["max"] == data.max()
+    assert os.path.exists(stats_path(path))
+    assert StatsCache().get(path) == stats
@@ -0,0 +1,61 @@
+import hashlib
+import os
+
+import pytest
+
+from services.volume_reader import volume_key
+from services.volume_requests import find_file, list_volume_files
+from services.volume_store import StoreUpload, link_existing, read_names, resolve_name, store_dir, validate_digest
+
+def store(filename, data):
+    upload = StoreUpload(filename)
+    with open(upload.temp_path, "wb") as f:
+        for start in range(0, len(data), 7):
+            upload.update(data[start:start + 7])
+            f.write(data[start:start + 7])
+    return upload.commit()
+
+def test_upload_is_stored_under_digest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    stored = store("study.zip", b"volume data")
+
+    assert stored["digest"] == hashlib.sha256(b"volume data").hexdigest()
+    assert stored["path"] == os.path.join(store_dir(), stored["digest"] + ".zip")
+    assert stored["size"] == 11
+    assert stored["duplicate"] is False
+    assert resolve_name("study.zip") == stored["path"]
+
+def test_reupload_under_new_name_is_deduplicated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = store("study.vol", b"volume data")
+
+    second = store("renamed.vol", b"volume data")
+
+    assert second["duplicate"] is True
+    assert second["path"] == first["path"]
+    assert volume_key(resolve_name("renamed.vol")) == volume_key(first["path"])
+    assert sorted(os.listdir(store_dir())) == sorted([os.path.basename(first["path"]), "names.json"])
+    assert read_names() == {"study.vol": os.path.basename(first["path"]), "renamed.vol": os.path.basename(first["path"])}
+
+def test_link_existing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stored = store("study.vol", b"volume data")
+
+    linked = link_existing("copy.vol", stored["digest"])
+
+    assert linked["path"] == stored["path"]
+    assert find_file("copy.vol") == stored["path"]
+    assert link_existing("copy.vol", "0" * 64) is None
+
+    listed = {file["name"]: file for file in list_volume_files()}
+    assert listed["copy.vol"]["digest"] == stored["digest"]
+    assert listed["copy.vol"]["path"] == stored["path"]
+
+def test_invalid_input(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(ValueError):
+        validate_digest("../../etc/passwd")
+    with pytest.raises(ValueError):
+        StoreUpload("study.exe")
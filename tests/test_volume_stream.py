@@ -0,0 +1,75 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from services.volume_reader import open_volume
+from services.volume_stream import progressive_levels, slice_batch
+from test_volume_reader import write_test_volume
+
+def parse_batch(payload):
+    """Разбирает пакет срезов: длина заголовка, JSON, данные"""
+    (length,) = struct.unpack("<I", payload[:4])
+    header = json.loads(payload[4:4 + length])
+    return header, payload[4 + length:]
+
+def test_slice_batch_layout(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    size, chunks = slice_batch(open_volume(path), "coronal", 10, 20, 5)
+    payload = b"".join(chunks)
+    header, body = parse_batch(payload)
+
+    assert len(payload) == size
+    # Данные uint16 начинаются с четного смещения и читаются Uint16Array без копирования
+    assert (len(payload) - len(body)) % 2 == 0
+    assert header["indices"] == [10, 15]
+    assert header["shape"] == [4, 512]
+    for index, offset in zip(header["indices"], header["offsets"]):
+        plane = np.frombuffer(body[offset:offset + header["slice_bytes"]], dtype="<u2")
+        assert np.array_equal(plane.reshape(header["shape"]), data[:, index, :])
+
+def test_slice_batch_rejects_bad_range(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    with pytest.raises(IndexError, match="вне 0..4"):
+        slice_batch(open_volume(path), "axial", 2, 10)
+
+def test_progressive_levels_coarse_to_fine(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    size, chunks = progressive_levels(path, finest=0, coarsest=2)
+    payload = b"".join(chunks)
+    assert len(payload) == size
+
+    frames = []
+    while payload:
+        header, rest = parse_batch(payload)
+        frames.append((header, np.frombuffer(rest[:header["bytes"]], dtype="<u2").reshape(header["shape"])))
+        payload = rest[header["bytes"]:]
+
+    assert [header["level"] for header, _ in frames] == [2, 1, 0]
+    assert [header["final"] for header, _ in frames] == [False, False, True]
+    assert frames[0][1].shape == (1, 128, 128)
+    assert np.array_equal(frames[-1][1], data)
+
+def test_progressive_levels_rejects_bad_order(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    with pytest.raises(ValueError, match="грубее начального"):
+        progressive_levels(path, finest=2, coarsest=1)
+
+def test_single_slice_batch_is_aligned(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path)
+
+    for index in range(4):
+        size, chunks = slice_batch(open_volume(path), "axial", index, index + 1)
+        header, body = parse_batch(b"".join(chunks))
+        assert (size - len(body)) % 2 == 0
+
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from services.render_pool import render_tile
+from services.slice_codecs import validate_format
+from services.volume_tiles import level_index, tile_bounds, tile_layout
+from test_volume_reader import write_test_volume
+
+def test_tile_layout_follows_pyramid():
+    layout = tile_layout((4, 800, 900), "axial")
+
+    assert [zoom["level"] for zoom in layout["zooms"]] == [3, 2, 1, 0]
+    assert layout["zooms"][0]["columns"] == 1
+    assert layout["zooms"][3]["width"] == 900
+    assert (layout["zooms"][3]["columns"], layout["zooms"][3]["rows"]) == (4, 4)
+
+def test_edge_tiles_are_clipped():
+    assert tile_bounds((4, 800, 900), "axial", 3, 3) == ((768, 800), (768, 900))
+    assert tile_bounds((4, 800, 900), "coronal", 1, 0) == ((0, 4), (256, 512))
+    with pytest.raises(IndexError):
+        tile_bounds((4, 800, 900), "axial", 4, 0)
+
+def test_full_resolution_tile_matches_slice(tmp_path):
+    path = str(tmp_path / "test.vol")
+    data = write_test_volume(path)
+
+    tile, _, headers = render_tile(path, "axial", 2, 3, 1, 0, None, validate_format("raw"))
+
+    assert headers["X-Slice-Shape"] == "256,256"
+    assert np.array_equal(np.frombuffer(tile, dtype="<u2").reshape(256, 256), data[2, 0:256, 256:512])
+
+def test_level_index_clamps_odd_sizes():
+    assert [level_index((101, 64, 64), "axial", 100, level) for level in range(4)] == [100, 49, 24, 11]
+    with pytest.raises(IndexError, match="вне диапазона"):
+        level_index((101, 64, 64), "axial", 101, 0)
+
+def test_last_slice_of_odd_volume_renders_at_every_zoom(tmp_path):
+    path = str(tmp_path / "test.vol")
+    write_test_volume(path, depth=5)
+
+    for zoom in range(4):
+        tile, _, _ = render_tile(path, "axial", 4, zoom, 0, 0, None, validate_format("raw"))
+        assert tile
+